@@ -2,63 +2,78 @@ from flask import Flask, request
 from flask_migrate import Migrate
 from flask_restful import Api
 from config import Config
+from commands import register_commands
 from extensions import db, jwt, image_set, cache, limiter
 from flask_uploads import configure_uploads
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import instrumentation
+import routing
+from feed import latest_feed
+from images import image_pipeline
+from mail_queue import mail_queue
+from passwords import password_hasher
+from revocation import revocation_store
+from storage import image_storage
 
 from resources.recipe import (
     RecipeResource,
     RecipeListResource,
     RecipePublishResource,
     RecipeCoverUploadResource,
+    RecipeBulkResource,
+    RecipeIngredientSearchResource,
 )
 from resources.user import (
     UserListResource,
     UserResource,
     MeResource,
     UserRecipeListResource,
+    UserRecipeExportResource,
+    UserStatsResource,
     UserActivateResource,
     UserAvatarUploadResource,
 )
-from resources.token import TokenResource, RefreshResource, RevokeResource, blacklist
+from resources.cache import CacheDebugResource
+from resources.token import TokenResource, RefreshResource, RevokeResource
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+
+    if app.config["PROXY_FIX_X_FOR"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
+
     register_extensions(app)
     register_resources(app)
+    register_commands(app)
 
     return app
 
 
 def register_extensions(app):
     db.init_app(app)
+    routing.init_app(app)
     migrate = Migrate(app, db)
     jwt.init_app(app)
 
     configure_uploads(app, image_set)
+    image_storage.init_app(app)
     cache.init_app(app)
+    instrumentation.init_app(app)
     limiter.init_app(app)
+    mail_queue.init_app(app)
+    image_pipeline.init_app(app)
+    revocation_store.init_app(app)
+    latest_feed.init_app(app)
+    password_hasher.init_app(app)
 
     @jwt.token_in_blocklist_loader
     def check_if_token_in_blacklist(jwt_header, jwt_payload: dict):
         jti = jwt_payload["jti"]
 
-        return jti in blacklist
-
-    @app.before_request
-    def before_request():
-        # print("\n=========BEFORE REQUEST=============\n")
-        print(cache.cache._cache.keys())
-        # print("\n====================================\n")
-
-    @app.after_request
-    def after_request(response):
-        # print("\n=========AFTER REQUEST=============\n")
-        print(cache.cache._cache.keys())
-        # print("\n====================================\n")
-
-        return response
+        return revocation_store.is_revoked(jti)
 
     # @limiter.request_filter
     # def ip_whitelist():
@@ -69,12 +84,18 @@ def register_resources(app):
     api = Api(app)
 
     api.add_resource(RecipeListResource, "/recipes")
+    api.add_resource(RecipeBulkResource, "/recipes/bulk")
+    api.add_resource(RecipeIngredientSearchResource, "/recipes/by-ingredients")
     api.add_resource(RecipeResource, "/recipes/<int:recipe_id>")
     api.add_resource(RecipePublishResource, "/recipes/<int:recipe_id>/publish")
     api.add_resource(RecipeCoverUploadResource, "/recipes/<int:recipe_id>/cover")
     api.add_resource(UserListResource, "/users")
     api.add_resource(UserResource, "/users/<string:username>")
     api.add_resource(UserRecipeListResource, "/users/<string:username>/recipes")
+    api.add_resource(
+        UserRecipeExportResource, "/users/<string:username>/recipes/export"
+    )
+    api.add_resource(UserStatsResource, "/users/<string:username>/stats")
     api.add_resource(UserActivateResource, "/users/activate/<string:token>")
     api.add_resource(UserAvatarUploadResource, "/users/avatar")
     api.add_resource(TokenResource, "/token")
@@ -82,6 +103,9 @@ def register_resources(app):
     api.add_resource(RefreshResource, "/refresh")
     api.add_resource(RevokeResource, "/revoke")
 
+    if app.config["CACHE_DEBUG_ENDPOINT"]:
+        api.add_resource(CacheDebugResource, "/debug/cache")
+
 
 app = create_app()
 
@@ -0,0 +1,11 @@
+"""Load tests and micro-benchmarks for the hot endpoints
+
+Run from the ``smilecook`` directory::
+
+    python -m benchmarks --recipes 5000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks --recipes 5000 --baseline benchmarks/baseline.json
+
+Every run seeds a fresh SQLite database (or the one given by
+``--database-url``), then drives each scenario through the Flask test client
+and through a real WSGI server (waitress when installed, werkzeug otherwise).
+"""
@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--database-url", help="Empty database to seed.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--modes", default="client,server", help="Comma separated: client,server"
+    )
+    parser.add_argument("--only", help="Run scenarios whose name contains this.")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Measure with the response cache off."
+    )
+    parser.add_argument("--output", help="Write results as JSON.")
+    parser.add_argument("--baseline", help="Fail on regressions against this file.")
+    parser.add_argument("--save-baseline", help="Write results as the new baseline.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown as a fraction (default: 0.25).",
+    )
+
+    return parser.parse_args(argv)
+
+
+def configure(args):
+    # Must run before ``app`` is imported; it builds the app at import time.
+    workdir = tempfile.mkdtemp(prefix="smilecook-bench-")
+    database_url = args.database_url or f"sqlite:///{workdir}/benchmark.db"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+
+    from config import Config
+
+    Config.DEBUG = False
+    Config.SQLALCHEMY_DATABASE_URI = database_url
+    Config.SECRET_KEY = Config.SECRET_KEY or "benchmark-secret-key"
+    Config.RATELIMIT_ENABLED = False
+    Config.MAIL_QUEUE_WORKER = False
+    Config.UPLOADED_IMAGES_DEST = os.path.join(workdir, "images")
+
+    if args.no_cache:
+        Config.CACHE_TYPE = "NullCache"
+        Config.FEED_SIZE = 0
+
+    return workdir
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = configure(args)
+
+    from app import app
+    from benchmarks.runner import compare, run_client, run_server, serve
+    from benchmarks.scenarios import scenarios
+    from benchmarks.seed import PASSWORD, seed
+    from extensions import db
+    from models.recipe import Recipe
+    from models.user import User
+
+    with app.app_context():
+        db.create_all()
+        if User.query.first() is not None:
+            sys.exit("The benchmark database must be empty.")
+
+        print(f"Seeding {args.users} users and {args.recipes} recipes in {workdir}")
+        usernames = seed(users=args.users, recipes=args.recipes, seed=args.seed)
+
+        owner = User.get_by_username(usernames[0])
+        published_ids = [
+            id for (id,) in db.session.query(Recipe.id).filter_by(is_publish=True)
+        ]
+        owned_ids = [recipe.id for recipe in owner.recipes] or published_ids[:1]
+
+    token = (
+        app.test_client()
+        .post("/token", json={"email": owner.email, "password": PASSWORD})
+        .get_json()["access_token"]
+    )
+
+    selected = [
+        scenario
+        for scenario in scenarios(published_ids, owned_ids, usernames, token)
+        if not args.only or args.only in scenario.name
+    ]
+    modes = args.modes.split(",")
+
+    results = {}
+    print(f"{'scenario':<42}{'mode':<8}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}")
+
+    def report(key, mode, name, result):
+        results[key] = result
+        errors = f"  ({result['errors']} errors)" if result["errors"] else ""
+        print(
+            f"{name:<42}{mode:<8}{result['p50']:>9}{result['p95']:>9}"
+            f"{result['p99']:>9}{result['rps']:>9}{errors}"
+        )
+
+    if "client" in modes:
+        for scenario in selected:
+            rng = random.Random(args.seed)
+            result = run_client(app, scenario, rng, args.requests, args.warmup)
+            report(f"client:{scenario.name}", "client", scenario.name, result)
+
+    if "server" in modes:
+        with serve(app, threads=args.concurrency) as base_url:
+            for scenario in selected:
+                rng = random.Random(args.seed)
+                result = run_server(
+                    base_url,
+                    scenario,
+                    rng,
+                    args.requests,
+                    args.warmup,
+                    args.concurrency,
+                )
+                report(f"server:{scenario.name}", "server", scenario.name, result)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import io
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return 0.0
+
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def summarize(latencies, elapsed, errors):
+    latencies = sorted(latencies)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50": round(percentile(latencies, 50) * 1000, 3),
+        "p95": round(percentile(latencies, 95) * 1000, 3),
+        "p99": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def client_call(client, request):
+    kwargs = {"json": request.json, "headers": request.headers}
+    if request.files:
+        kwargs["data"] = {
+            field: (io.BytesIO(content), filename)
+            for field, (filename, content, _) in request.files.items()
+        }
+        kwargs["content_type"] = "multipart/form-data"
+
+    response = client.open(request.path, method=request.method, **kwargs)
+    response.close()
+
+    return response.status_code
+
+
+def run_client(app, scenario, rng, count, warmup):
+    client = app.test_client()
+
+    for _ in range(warmup):
+        client_call(client, scenario.build(rng))
+
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(count):
+        request = scenario.build(rng)
+        start = time.perf_counter()
+        status = client_call(client, request)
+        latencies.append(time.perf_counter() - start)
+        errors += status >= 400
+
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+@contextmanager
+def serve(app, threads):
+    """Run ``app`` on a free local port with waitress, or werkzeug's threaded
+    server when waitress is not installed, and yield its base URL."""
+    try:
+        from waitress.server import create_server
+    except ImportError:
+        create_server = None
+
+    if create_server is not None:
+        server = create_server(app, host="127.0.0.1", port=0, threads=threads)
+        port, run, stop = server.effective_port, server.run, server.close
+    else:
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        server = make_server(
+            "127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler
+        )
+        port, run, stop = server.server_port, server.serve_forever, server.shutdown
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        stop()
+
+
+def run_server(base_url, scenario, rng, count, warmup, concurrency):
+    local = threading.local()
+
+    def call(request):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+
+        start = time.perf_counter()
+        response = session.request(
+            request.method,
+            base_url + request.path,
+            json=request.json,
+            files=request.files,
+            headers=request.headers,
+        )
+        return time.perf_counter() - start, response.status_code
+
+    # Requests are built up front so the workers share no random state.
+    warmups = [scenario.build(rng) for _ in range(warmup)]
+    batch = [scenario.build(rng) for _ in range(count)]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, warmups))
+
+        started = time.perf_counter()
+        results = list(executor.map(call, batch))
+        elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    errors = sum(status >= 400 for _, status in results)
+
+    return summarize(latencies, elapsed, errors)
+
+
+def compare(results, baseline, tolerance):
+    """Return a message for every result slower than ``baseline`` by more than
+    ``tolerance`` (a fraction) in p95 latency or throughput."""
+    regressions = []
+
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+
+        if result["p95"] > expected["p95"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: p95 {result['p95']}ms vs baseline {expected['p95']}ms"
+            )
+        if result["rps"] < expected["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: {result['rps']} req/s vs baseline {expected['rps']} req/s"
+            )
+
+    return regressions
@@ -0,0 +1,96 @@
+import io
+from collections import namedtuple
+
+from PIL import Image
+
+from benchmarks.seed import PASSWORD
+
+SORTS = ["created_at", "cook_time", "num_of_servings", "id"]
+ORDERS = ["asc", "desc"]
+QUERIES = ["chicken", "tomato soup", "garlic butter", "lemon"]
+RANGES = {
+    "quick": "max_cook_time=30",
+    "serves2-4": "min_servings=2&max_servings=4",
+    "mixed": "min_cook_time=10&max_cook_time=240&max_servings=6",
+}
+
+Request = namedtuple("Request", ["method", "path", "json", "files", "headers"])
+Request.__new__.__defaults__ = (None, None, None)
+
+# ``build(rng)`` returns the next Request, so runs can vary pages and ids.
+Scenario = namedtuple("Scenario", ["name", "build"])
+
+
+def jpeg(size=(1200, 800)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 120, 40)).save(buffer, "JPEG", quality=90)
+
+    return buffer.getvalue()
+
+
+def scenarios(published_ids, owned_ids, usernames, token):
+    # ``token`` belongs to the owner of ``owned_ids``; they take the uploads.
+    headers = {"Authorization": f"Bearer {token}"}
+    image = jpeg()
+
+    def recipes(sort, order, q=None, ranges=None):
+        def build(rng):
+            # Searches and filters match too few recipes for deep pages.
+            page = 1 if q or ranges else rng.randint(1, 5)
+            path = f"/recipes?sort={sort}&order={order}&page={page}"
+            if q:
+                path += f"&q={q}"
+            if ranges:
+                path += f"&{ranges}"
+            return Request("GET", path)
+
+        return build
+
+    def search(rng):
+        q = rng.choice(QUERIES).replace(" ", "+")
+        return Request("GET", f"/recipes?q={q}&sort=relevance")
+
+    def recipe(rng):
+        return Request("GET", f"/recipes/{rng.choice(published_ids)}")
+
+    def user_recipes(rng):
+        return Request("GET", f"/users/{rng.choice(usernames)}/recipes")
+
+    def login(rng):
+        username = rng.choice(usernames)
+        json = {"email": f"{username}@example.com", "password": PASSWORD}
+        return Request("POST", "/token", json=json)
+
+    def cover_upload(rng):
+        files = {"cover_image": ("cover.jpg", image, "image/jpeg")}
+        path = f"/recipes/{rng.choice(owned_ids)}/cover"
+        return Request("PUT", path, files=files, headers=headers)
+
+    def avatar_upload(rng):
+        files = {"avatar": ("avatar.jpg", image, "image/jpeg")}
+        return Request("PUT", "/users/avatar", files=files, headers=headers)
+
+    yield from (
+        Scenario(f"recipes sort={sort} order={order}", recipes(sort, order))
+        for sort in SORTS
+        for order in ORDERS
+    )
+    yield Scenario("recipes q sort=relevance", search)
+    yield from (
+        Scenario(f"recipes q sort={sort}", recipes(sort, "desc", q="chicken"))
+        for sort in SORTS
+    )
+    yield from (
+        Scenario(f"recipes {label} sort={sort}", recipes(sort, "desc", ranges=ranges))
+        for label, ranges in RANGES.items()
+        for sort in SORTS
+    )
+    yield from (
+        Scenario(f"recipes q {label}", recipes("created_at", "desc", "chicken", ranges))
+        for label, ranges in RANGES.items()
+    )
+    yield Scenario("recipe detail", recipe)
+    yield Scenario("user recipes", user_recipes)
+    yield Scenario("token", login)
+    yield Scenario("recipe cover upload", cover_upload)
+    yield Scenario("avatar upload", avatar_upload)
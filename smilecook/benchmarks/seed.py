@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from extensions import db
+from models.recipe import Recipe
+from models.user import User
+from utils import hash_password
+
+PASSWORD = "benchmark"
+
+WORDS = """
+apple basil bean beef butter carrot cheese chicken chili chocolate coconut corn
+cream curry egg fish garlic ginger honey lemon lentil lime mint mushroom noodle
+onion orange pasta peanut pepper pork potato rice salmon soup spinach stew tofu
+tomato vanilla
+""".split()
+
+
+def seed(users=50, recipes=2000, published_ratio=0.8, seed=0, batch_size=1000):
+    """Insert ``users`` active users and ``recipes`` recipes spread across them.
+
+    Recipes go through ``Recipe.bulk_insert``, so their ingredient rows, change
+    log and the users' counters are written as the app would. Returns the
+    usernames; every user's password is ``PASSWORD``.
+    """
+    rng = random.Random(seed)
+    password = hash_password(PASSWORD)
+    now = datetime.utcnow()
+
+    usernames = [f"user{index}" for index in range(users)]
+    db.session.execute(
+        insert(User),
+        [
+            {
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": password,
+                "is_active": True,
+            }
+            for username in usernames
+        ],
+    )
+    db.session.commit()
+    user_ids = [id for (id,) in db.session.query(User.id).order_by(User.id)]
+
+    rows = []
+    for index in range(recipes):
+        words = rng.sample(WORDS, 4)
+        created_at = now - timedelta(minutes=recipes - index)
+        rows.append(
+            {
+                "name": " ".join(words[:2]).title(),
+                "description": f"A {words[2]} and {words[3]} dish",
+                "directions": "Mix everything, then cook until done.",
+                "ingredients": ", ".join(words),
+                "num_of_servings": rng.randint(1, 12),
+                "cook_time": rng.choice([None] + list(range(5, 245, 5))),
+                "is_publish": rng.random() < published_ratio,
+                "user_id": rng.choice(user_ids),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+
+        if len(rows) == batch_size:
+            Recipe.bulk_insert(rows)
+            rows = []
+
+    if rows:
+        Recipe.bulk_insert(rows)
+
+    return usernames
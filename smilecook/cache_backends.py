@@ -0,0 +1,125 @@
+"""Flask-Caching backends that keep hit/miss/eviction counters
+
+Set ``CACHE_TYPE`` to ``cache_backends.FileSystemCache`` (the default) or
+``cache_backends.SimpleCache``. Counters are per process and every update is
+O(1); only a prune, which walks the stored items anyway, counts what it
+evicted under each key prefix. Reads are also reported to ``instrumentation``
+for the per-request ``Server-Timing`` header.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask_caching.backends import filesystemcache, simplecache
+
+import instrumentation
+
+PREFIX_RE = re.compile(r"[:/]")
+UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def key_prefix(key):
+    return PREFIX_RE.split(key, maxsplit=1)[0]
+
+
+class CacheMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prefixes = defaultdict(Counter)
+        self.evictions = 0
+
+    def record(self, key, event):
+        with self._lock:
+            self._prefixes[key_prefix(key)][event] += 1
+
+    def record_evictions(self, before, after):
+        """Count the items gone between two ``stored_prefixes()`` counts."""
+        with self._lock:
+            for prefix, count in (before - after).items():
+                self._prefixes[prefix]["evictions"] += count
+                self.evictions += count
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "prefixes": {
+                    prefix: {
+                        event: counts[event]
+                        for event in ("hits", "misses", "sets", "deletes", "evictions")
+                    }
+                    for prefix, counts in self._prefixes.items()
+                },
+                "evictions": self.evictions,
+            }
+
+
+class InstrumentedCache:
+    def __init__(self, *args, **kwargs):
+        self.metrics = CacheMetrics()
+        super().__init__(*args, **kwargs)
+
+    def get(self, key):
+        start = time.perf_counter()
+        value = super().get(key)
+        if key != getattr(self, "_fs_count_file", None):
+            self.metrics.record(key, "misses" if value is None else "hits")
+            instrumentation.record_cache_read(
+                key, value is not None, time.perf_counter() - start
+            )
+        return value
+
+    def set(self, key, value, timeout=None, **kwargs):
+        # FileSystemCache stores its own item count through set()
+        if not kwargs.get("mgmt_element"):
+            self.metrics.record(key, "sets")
+        return super().set(key, value, timeout=timeout, **kwargs)
+
+    def delete(self, key, **kwargs):
+        if not kwargs.get("mgmt_element"):
+            self.metrics.record(key, "deletes")
+        return super().delete(key, **kwargs)
+
+    def _prune(self):
+        if not self._over_threshold():
+            return super()._prune()
+
+        before = self.stored_prefixes()
+        super()._prune()
+        if before is not None:
+            self.metrics.record_evictions(before, self.stored_prefixes())
+
+    def stored_prefixes(self):
+        """Number of stored items per key prefix, or None if the backend
+        cannot tell."""
+        return None
+
+
+class FileSystemCache(InstrumentedCache, filesystemcache.FileSystemCache):
+    """Cache files are named ``<key prefix>.<key hash>`` so a prune can tell
+    what it evicted, whichever process stored it."""
+
+    def _get_filename(self, key):
+        prefix = UNSAFE_FILENAME_RE.sub("_", key_prefix(key))[:64]
+        filename = super()._get_filename(key)
+
+        return os.path.join(
+            os.path.dirname(filename), f"{prefix}.{os.path.basename(filename)}"
+        )
+
+    def stored_prefixes(self):
+        return Counter(
+            os.path.basename(filename).rpartition(".")[0]
+            for filename in self._list_dir()
+        )
+
+
+class SimpleCache(InstrumentedCache, simplecache.SimpleCache):
+    def add(self, key, value, timeout=None):
+        self.metrics.record(key, "sets")
+        return super().add(key, value, timeout=timeout)
+
+    def stored_prefixes(self):
+        return Counter(key_prefix(key) for key in self._cache)
@@ -0,0 +1,115 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_restful.representations.json import output_json
+
+from extensions import db
+from images import image_pipeline, rendition_filename
+from mail_queue import mail_queue
+from models.recipe import Recipe
+from models.stored_image import StoredImage
+from models.user import User
+from query_plans import check_query_plans
+from schemas.recipe import RecipePaginationSchema, RecipeListSerializer
+from storage import image_storage
+from utils import RECIPES_NAMESPACE, clear_cache
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans_command():
+    """Fail if a hot recipe query needs a sequential scan or a sort."""
+    failures = 0
+
+    for name, problems in check_query_plans(db.session):
+        if problems:
+            failures += 1
+            click.echo(f"FAIL {name}: {'; '.join(problems)}")
+        else:
+            click.echo(f"ok   {name}")
+
+    if failures:
+        raise click.ClickException(f"{failures} query shape(s) are not index-backed")
+
+
+@click.command("check-serializer-parity")
+@click.option("--pages", default=10, help="Number of 30-recipe pages to compare.")
+@with_appcontext
+def check_serializer_parity_command(pages):
+    """Compare RecipeListSerializer output byte for byte with marshmallow."""
+    schema = RecipePaginationSchema()
+    serializer = RecipeListSerializer()
+
+    with current_app.test_request_context("/recipes"):
+        for page in range(1, pages + 1):
+            paginated = Recipe.published_query().paginate(
+                page=page, per_page=30, error_out=False
+            )
+
+            expected = output_json(schema.dump(paginated), 200).get_data()
+            actual = output_json(serializer.dump(paginated), 200).get_data()
+            if actual != expected:
+                raise click.ClickException(f"Serializer output differs on page {page}")
+
+            click.echo(f"ok   page {page} ({len(paginated.items)} recipes)")
+
+            if not paginated.has_next:
+                break
+
+
+@click.command("reconcile-recipe-counts")
+@with_appcontext
+def reconcile_recipe_counts_command():
+    """Recount every user's published and draft recipes and fix drift."""
+    drifted = User.reconcile_recipe_counts()
+
+    click.echo(f"Fixed recipe counts for {len(drifted)} user(s)")
+
+
+@click.command("render-images")
+@with_appcontext
+def render_images_command():
+    """Render every image without renditions, including uploads from before
+    reference counting."""
+    adopted = StoredImage.adopt("recipes", Recipe.cover_image) + StoredImage.adopt(
+        "avatars", User.avatar_image
+    )
+    if adopted:
+        click.echo(f"Adopted {adopted} image(s) from before reference counting")
+
+    failures = 0
+    for folder, filename in StoredImage.pending():
+        # Rendered before readiness was recorded.
+        if image_storage.exists(folder, rendition_filename(filename, "full")):
+            StoredImage.mark_rendered(folder, filename)
+            click.echo(f"ok   {folder}/{filename} (already rendered)")
+        elif image_pipeline.process(folder, filename):
+            click.echo(f"ok   {folder}/{filename}")
+        else:
+            failures += 1
+            click.echo(f"FAIL {folder}/{filename}")
+
+    # Listed pages switch to the renditions; other entries expire on their own.
+    clear_cache(RECIPES_NAMESPACE)
+
+    if failures:
+        raise click.ClickException(f"{failures} image(s) could not be rendered")
+
+
+@click.command("send-queued-mail")
+@click.option("--loop", is_flag=True, help="Keep polling for new jobs.")
+@with_appcontext
+def send_queued_mail_command(loop):
+    """Deliver pending registration emails from the mail queue."""
+    if loop:
+        mail_queue.run()
+    else:
+        click.echo(f"Processed {mail_queue.drain_all()} queued email(s)")
+
+
+def register_commands(app):
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(check_serializer_parity_command)
+    app.cli.add_command(reconcile_recipe_counts_command)
+    app.cli.add_command(render_images_command)
+    app.cli.add_command(send_queued_mail_command)
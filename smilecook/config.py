@@ -1,4 +1,6 @@
 """ Configuration Data for the database"""
+import os
+import tempfile
 from os import getenv
 from dotenv import load_dotenv
 
@@ -12,23 +14,119 @@ SECRET_KEY = getenv("SECRET_KEY")
 JWT_ERROR_MESSAGE_KEY = getenv("JWT_ERROR_MESSAGE_KEY")
 MAILGUN_DOMAIN = getenv("MAILGUN_DOMAIN")
 MAILGUN_API_KEY = getenv("MAILGUN_API_KEY")
+MAILGUN_API_URL = getenv("MAILGUN_API_URL", "https://api.mailgun.net/v3/{}/messages")
+CACHE_TYPE = getenv("CACHE_TYPE", "cache_backends.FileSystemCache")
+CACHE_DIR = getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "smilecook-cache"))
+CACHE_REDIS_URL = getenv("CACHE_REDIS_URL")
+IMAGE_STORAGE = getenv("IMAGE_STORAGE", "storage.LocalStorage")
+RATELIMIT_STORAGE_URI = getenv(
+    "RATELIMIT_STORAGE_URI",
+    "sqlite:///" + os.path.join(tempfile.gettempdir(), "smilecook-ratelimit.db"),
+)
+PROXY_FIX_X_FOR = int(getenv("PROXY_FIX_X_FOR", 0))
+METRICS_ENDPOINT = getenv("METRICS_ENDPOINT", "false").lower() in ("1", "true", "yes")
+METRICS_TOKEN = getenv("METRICS_TOKEN")
+FEED_LOCK_FILE = getenv(
+    "FEED_LOCK_FILE", os.path.join(tempfile.gettempdir(), "smilecook-feed.lock")
+)
+DATABASE_URL = getenv(
+    "DATABASE_URL", f"postgresql+psycopg2://{USER_NAME}:{PASSWORD}@{HOSTNAME}/{DBNAME}"
+)
+DATABASE_REPLICA_URL = getenv("DATABASE_REPLICA_URL")
+DATABASE_REPLICA_READ_DELAY = float(getenv("DATABASE_REPLICA_READ_DELAY", 2))
+DB_POOL_SIZE = int(getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT = int(getenv("DB_STATEMENT_TIMEOUT", 0))
+
+
+def engine_options(url):
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+
+    # SQLite uses its own pools and has no server-side statement timeout.
+    if url.startswith("sqlite"):
+        return options
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+
+    if DB_STATEMENT_TIMEOUT and url.startswith("postgresql"):
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+        }
+
+    return options
 
 
 class Config:
     DEBUG = True
 
-    SQLALCHEMY_DATABASE_URI = (
-        f"postgresql+psycopg2://{USER_NAME}:{PASSWORD}@{HOSTNAME}/{DBNAME}"
-    )
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(DATABASE_URL)
+    SQLALCHEMY_BINDS = {}
+    if DATABASE_REPLICA_URL:
+        SQLALCHEMY_BINDS["replica"] = {
+            "url": DATABASE_REPLICA_URL,
+            **engine_options(DATABASE_REPLICA_URL),
+        }
+    DATABASE_REPLICA_READ_DELAY = DATABASE_REPLICA_READ_DELAY
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = SECRET_KEY
     JWT_ERROR_MESSAGE_KEY = JWT_ERROR_MESSAGE_KEY
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
+    REVOCATION_SYNC_INTERVAL = 5
+    REVOCATION_SYNC_OVERLAP = 60
+    REVOCATION_PRUNE_INTERVAL = 60 * 60
+    PASSWORD_SCHEME = "pbkdf2_sha256"
+    PASSWORD_ROUNDS = 29000
+    PASSWORD_POOL_SIZE = 0
+    PASSWORD_POOL_TIMEOUT = 10
     MAILGUN_DOMAIN = MAILGUN_DOMAIN
     MAILGUN_API_KEY = MAILGUN_API_KEY
+    MAILGUN_API_URL = MAILGUN_API_URL
+    MAILGUN_TIMEOUT = 10
+    MAIL_QUEUE_WORKER = True
+    MAIL_QUEUE_BATCH_SIZE = 50
+    MAIL_QUEUE_POLL_INTERVAL = 5
+    MAIL_QUEUE_MAX_ATTEMPTS = 8
+    MAIL_QUEUE_BACKOFF = 30
+    MAIL_QUEUE_CLAIM_TIMEOUT = 15 * 60
     UPLOADED_IMAGES_DEST = "static/images"
+    IMAGE_STORAGE = IMAGE_STORAGE
+    IMAGE_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+    IMAGE_WORKERS = 2
+    IMAGE_DECODE_CONCURRENCY = 1
+    IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+    UPLOAD_CHUNK_SIZE = 64 * 1024
     MAX_CONTENT_LENGTH = 10 * 1000 * 1000
-    CACHE_TYPE = "simple"
+    BULK_IMPORT_BATCH_SIZE = 500
+    EXPORT_BATCH_SIZE = 500
+    RECIPE_INDEX_SYNC_INTERVAL = 5
+    RECIPE_INDEX_SYNC_OVERLAP = 60
+    RECIPE_CHANGE_RETENTION = 24 * 60 * 60
+    RECIPE_CHANGE_PRUNE_INTERVAL = 60 * 60
+    BATCH_LOOKUP_LIMIT = 100
+    FEED_SIZE = 150
+    FEED_LOCK_FILE = FEED_LOCK_FILE
+    CACHE_TYPE = CACHE_TYPE
+    CACHE_DIR = CACHE_DIR
+    CACHE_THRESHOLD = 10000
+    CACHE_REDIS_URL = CACHE_REDIS_URL
     CACHE_DEFAULT_TIMEOUT = 10 * 60
     RATELIMIT_HEADERS_ENABLED = True
+    RATELIMIT_STORAGE_URI = RATELIMIT_STORAGE_URI
+    RATELIMIT_STRATEGY = "moving-window"
+    PROXY_FIX_X_FOR = PROXY_FIX_X_FOR
+    SQL_QUERY_COUNT_HEADER = False
+    SERVER_TIMING_HEADER = True
+    # Off unless asked for; with METRICS_TOKEN set, scrapers must send it as
+    # a bearer token.
+    METRICS_ENDPOINT = METRICS_ENDPOINT
+    METRICS_TOKEN = METRICS_TOKEN
+    CACHE_DEBUG_ENDPOINT = False
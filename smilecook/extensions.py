@@ -1,11 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, get_jwt_identity, verify_jwt_in_request
 from flask_uploads import UploadSet, IMAGES
 from flask_caching import Cache
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from jwt.exceptions import PyJWTError
+from flask_jwt_extended.exceptions import JWTExtendedException
 
-db = SQLAlchemy()
+from routing import RoutingSession
+
+import ratelimit_storage  # noqa: F401  registers the sqlite:// limiter storage
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 jwt = JWTManager()
 
@@ -13,4 +19,19 @@ image_set = UploadSet("images", IMAGES)
 
 cache = Cache()
 
-limiter = Limiter(key_func=get_remote_address)
+
+def rate_limit_key():
+    # Clients behind one NAT or proxy get separate buckets once logged in.
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        identity = None
+
+    if identity is not None:
+        return f"user:{identity}"
+
+    return f"ip:{get_remote_address()}"
+
+
+limiter = Limiter(key_func=rate_limit_key)
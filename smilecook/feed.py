@@ -0,0 +1,225 @@
+"""Materialized "latest published recipes" feed
+
+The default ``/recipes`` listing (no search or filters, newest first) is served
+from the ``FEED_SIZE`` newest published recipes, kept in the shared cache as
+plain snapshots together with the published total, so those pages never touch
+the database. URLs and rendition readiness are still worked out per request by
+the serializer. ``FEED_SIZE = 0`` turns the feed off.
+
+After a commit that changes a published recipe or the author of one, only the
+affected rows are reloaded and moved into place. That happens under a file
+lock, so processes sharing the cache do not lose each other's updates. The
+feed is only built from scratch when it is missing from the cache.
+"""
+
+import fcntl
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session, selectinload
+
+from extensions import cache, db
+from models.recipe import Recipe
+from models.user import User
+from pagination import Page, order_by, seek
+
+FEED_KEY = "feed:latest"
+
+RECIPE_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "directions",
+    "num_of_servings",
+    "cook_time",
+    "ingredients",
+    "is_publish",
+    "cover_image",
+    "user_id",
+    "created_at",
+    "updated_at",
+)
+USER_FIELDS = ("id", "username", "avatar_image", "created_at", "updated_at")
+
+
+def sort_key(recipe):
+    return recipe.created_at, recipe.id
+
+
+def snapshot(recipe, authors):
+    user = recipe.user
+    if user is not None and user.id not in authors:
+        authors[user.id] = SimpleNamespace(
+            **{field: getattr(user, field) for field in USER_FIELDS}
+        )
+
+    return SimpleNamespace(
+        user=authors.get(recipe.user_id),
+        **{field: getattr(recipe, field) for field in RECIPE_FIELDS},
+    )
+
+
+class LatestFeed:
+    def __init__(self, app=None):
+        self.size = None
+        self.lock_file = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.size = app.config["FEED_SIZE"]
+        self.lock_file = app.config["FEED_LOCK_FILE"]
+
+    def page(self, page, per_page):
+        """Return a ``Page``, or None when the page is not fully inside
+        the feed and has to come from the database."""
+        if not self.size or page < 1 or per_page < 1:
+            return None
+
+        feed = cache.get(FEED_KEY) or self.build()
+        items, total = feed["items"], feed["total"]
+
+        start, end = (page - 1) * per_page, page * per_page
+        if end > len(items) and len(items) < total:
+            return None
+        # Past the last page; the database path answers with a 404.
+        if start >= len(items) and page != 1:
+            return None
+
+        return Page(items[start:end], page, per_page, total)
+
+    def build(self):
+        with self.locked(), Session(db.engine) as session:
+            # Someone else may have built it while we waited for the lock.
+            feed = cache.get(FEED_KEY)
+            if feed is None:
+                authors = {}
+                feed = {
+                    "items": [
+                        snapshot(recipe, authors)
+                        for recipe in self.newest(session).limit(self.size)
+                    ],
+                    "total": self.published(session).order_by(None).count(),
+                }
+                cache.set(FEED_KEY, feed, timeout=0)
+
+        return feed
+
+    def update(self, recipe_ids=(), user_ids=()):
+        with self.locked():
+            feed = cache.get(FEED_KEY)
+            if feed is None:
+                return
+
+            items = feed["items"]
+            changed = set(recipe_ids)
+            changed.update(item.id for item in items if item.user_id in user_ids)
+            if not changed:
+                return
+
+            # Only recipes at or above the old boundary belong in the feed.
+            boundary = sort_key(items[-1]) if len(items) >= self.size else None
+            items = [item for item in items if item.id not in changed]
+
+            with Session(db.engine) as session:
+                authors = {item.user.id: item.user for item in items if item.user}
+                for user_id in user_ids:
+                    authors.pop(user_id, None)
+
+                reloaded = self.published(session).filter(Recipe.id.in_(changed))
+                items.extend(
+                    snapshot(recipe, authors)
+                    for recipe in reloaded
+                    if boundary is None or sort_key(recipe) >= boundary
+                )
+                items.sort(key=sort_key, reverse=True)
+                del items[self.size :]
+
+                total = self.published(session).order_by(None).count()
+
+                # Refill from just below the last kept recipe.
+                if len(items) < min(self.size, total):
+                    query = self.published(session)
+                    if items:
+                        query = seek(
+                            query,
+                            Recipe.created_at,
+                            Recipe.id,
+                            False,
+                            *sort_key(items[-1]),
+                        )
+                    refill = order_by(query, Recipe.created_at, Recipe.id, "desc")
+                    items.extend(
+                        snapshot(recipe, authors)
+                        for recipe in refill.limit(self.size - len(items))
+                    )
+
+            cache.set(FEED_KEY, {"items": items, "total": total}, timeout=0)
+
+    @staticmethod
+    def published(session):
+        return (
+            session.query(Recipe)
+            .options(selectinload(Recipe.user))
+            .filter(Recipe.is_publish.is_(True))
+        )
+
+    def newest(self, session):
+        return order_by(self.published(session), Recipe.created_at, Recipe.id, "desc")
+
+    @contextmanager
+    def locked(self):
+        with open(self.lock_file, "a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+
+latest_feed = LatestFeed()
+
+
+def queue_feed_update(session, key, value):
+    session.info.setdefault(key, set()).add(value)
+
+
+@event.listens_for(Recipe, "after_insert")
+def queue_inserted_recipe(mapper, connection, target):
+    if target.is_publish:
+        queue_feed_update(object_session(target), "feed_recipes", target.id)
+
+
+@event.listens_for(Recipe, "after_update")
+def queue_updated_recipe(mapper, connection, target):
+    # Draft edits cannot change the feed.
+    if target.is_publish or inspect(target).attrs.is_publish.history.has_changes():
+        queue_feed_update(object_session(target), "feed_recipes", target.id)
+
+
+@event.listens_for(Recipe, "after_delete")
+def queue_deleted_recipe(mapper, connection, target):
+    queue_feed_update(object_session(target), "feed_recipes", target.id)
+
+
+@event.listens_for(User, "after_update")
+def queue_updated_author(mapper, connection, target):
+    # Any update bumps updated_at, which the feed shows for the author.
+    queue_feed_update(object_session(target), "feed_users", target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_feed_updates(session):
+    recipe_ids = session.info.pop("feed_recipes", None)
+    user_ids = session.info.pop("feed_users", None)
+
+    if recipe_ids or user_ids:
+        latest_feed.update(recipe_ids or (), user_ids or ())
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_feed_updates(session):
+    session.info.pop("feed_recipes", None)
+    session.info.pop("feed_users", None)
@@ -0,0 +1,195 @@
+"""Background image renditions for cover and avatar uploads"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from models.stored_image import StoredImage
+from storage import image_storage
+
+logger = logging.getLogger(__name__)
+
+# Written in this order, so a "full" file means all are there. It is also what
+# the default image URL points at once rendered.
+RENDITIONS = OrderedDict([("thumb", 200), ("medium", 800), ("full", 1600)])
+
+
+def rendition_filename(filename, rendition):
+    return f"{os.path.splitext(filename)[0]}_{rendition}.jpg"
+
+
+# Uploaded formats we accept, by Pillow format name, and the extension we store.
+IMAGE_FORMATS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def inspect_upload(stream, max_pixels):
+    """Check the image header in ``stream`` without decoding the pixels and
+    return the extension to store it under."""
+    position = stream.tell()
+
+    try:
+        with Image.open(stream) as image:
+            image_format, (width, height) = image.format, image.size
+    except (OSError, Image.DecompressionBombError):
+        raise InvalidImage("Not a valid image")
+    finally:
+        stream.seek(position)
+
+    if image_format not in IMAGE_FORMATS:
+        raise InvalidImage("Image format not allowed")
+
+    if width * height > max_pixels:
+        raise InvalidImage("Image dimensions are too large")
+
+    return IMAGE_FORMATS[image_format]
+
+
+def content_hash(stream, chunk_size):
+    position = stream.tell()
+    digest = hashlib.sha256()
+
+    while chunk := stream.read(chunk_size):
+        digest.update(chunk)
+
+    stream.seek(position)
+
+    return digest.hexdigest()
+
+
+def render(folder, filename, decode_slots):
+    renditions = {}
+
+    with decode_slots:
+        with image_storage.open(folder, filename) as source, Image.open(
+            source
+        ) as image:
+            # JPEGs decode at 1/2, 1/4 or 1/8 scale when that still covers
+            # the largest rendition, which saves most of the memory.
+            largest = max(RENDITIONS.values())
+            image.draft("RGB", (largest, largest))
+            resized = image.convert("RGB")
+
+        # Largest first, so each rendition is scaled down from the previous one.
+        for rendition, size in sorted(RENDITIONS.items(), key=lambda item: -item[1]):
+            resized = resized.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            renditions[rendition] = resized
+
+    for rendition in RENDITIONS:
+        buffer = io.BytesIO()
+        renditions[rendition].save(buffer, format="JPEG", optimize=True, quality=85)
+        buffer.seek(0)
+        image_storage.save(folder, rendition_filename(filename, rendition), buffer)
+
+
+class ImagePipeline:
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._decode_slots = None
+        self._lock = threading.Lock()
+        self._ready = OrderedDict()
+        self._ready_size = 10000
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config["IMAGE_WORKERS"], thread_name_prefix="images"
+        )
+        self._decode_slots = threading.BoundedSemaphore(
+            app.config["IMAGE_DECODE_CONCURRENCY"]
+        )
+
+    def submit(self, folder, filename, on_ready=None):
+        return self._executor.submit(self._process, folder, filename, on_ready)
+
+    def _process(self, folder, filename, on_ready):
+        with self.app.app_context():
+            if self.process(folder, filename) and on_ready is not None:
+                on_ready()
+
+    def process(self, folder, filename):
+        """Render ``filename`` in this thread and record it as ready."""
+        try:
+            render(folder, filename, self._decode_slots)
+        except FileNotFoundError:
+            # Released by a newer upload before the worker got to it.
+            self.delete(folder, filename)
+            return False
+        except Exception:
+            logger.exception("Failed to render %s/%s", folder, filename)
+            return False
+
+        if not image_storage.exists(folder, filename):
+            self.delete(folder, filename)
+            return False
+
+        StoredImage.mark_rendered(folder, filename)
+        self._mark_ready(folder, filename)
+
+        return True
+
+    def _mark_ready(self, folder, filename):
+        with self._lock:
+            self._ready[(folder, filename)] = True
+            self._ready.move_to_end((folder, filename))
+            if len(self._ready) > self._ready_size:
+                self._ready.popitem(last=False)
+
+    def ready(self, folder, filenames):
+        """Return the subset of ``filenames`` whose renditions are ready.
+        Names not yet known to be ready cost one query for the whole batch."""
+        filenames = {filename for filename in filenames if filename}
+        ready = {
+            filename for filename in filenames if (folder, filename) in self._ready
+        }
+
+        # Renditions may have been produced by another process.
+        if filenames - ready:
+            for filename in StoredImage.rendered(folder, filenames - ready):
+                self._mark_ready(folder, filename)
+                ready.add(filename)
+
+        return ready
+
+    def is_ready(self, folder, filename):
+        return filename in self.ready(folder, [filename])
+
+    def rendition_urls(self, folder_url, folder, filename, ready=None):
+        if ready is None:
+            ready = bool(filename) and self.is_ready(folder, filename)
+
+        if not filename or not ready:
+            return None
+
+        return {
+            rendition: folder_url + rendition_filename(filename, rendition)
+            for rendition in RENDITIONS
+        }
+
+    def delete(self, folder, filename):
+        filenames = [filename] + [
+            rendition_filename(filename, rendition) for rendition in RENDITIONS
+        ]
+
+        for name in filenames:
+            image_storage.delete(folder, name)
+
+        with self._lock:
+            self._ready.pop((folder, filename), None)
+
+
+image_pipeline = ImagePipeline()
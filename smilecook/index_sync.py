@@ -0,0 +1,107 @@
+"""Keep in-process recipe indexes in step across processes
+
+Every committed write to a recipe also logs its id in ``recipe_change``, in
+the same transaction. An index built from recipes applies this process's
+commits as they happen, and at most every ``RECIPE_INDEX_SYNC_INTERVAL``
+seconds reads the ids logged since its last sync and reloads just those
+recipes, the way ``RevocationStore`` follows ``revoked_token``. It is only
+rebuilt from scratch on first use and after sitting idle for so long that the
+log may have been pruned under it.
+
+Both read from the primary, since a replica can be behind the log.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.recipe_change import RecipeChange
+
+
+class IndexSync:
+    # Past this many changed recipes a rebuild is cheaper than reloading each.
+    MAX_REFRESH = 1000
+
+    def __init__(self, build, refresh):
+        """``build(session)`` loads the whole index, ``refresh(session,
+        recipe_ids)`` reloads the given recipes, deleted ones included."""
+        self.build = build
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._watermark = None
+        self._synced_at = None
+        self._pruned_at = None
+
+    def invalidate(self):
+        """Rebuild on the next sync, e.g. after the database was restored."""
+        with self._lock:
+            self._synced_at = None
+
+    def sync(self, force=False):
+        config = current_app.config
+        now = time.monotonic()
+
+        if (
+            not force
+            and self._synced_at is not None
+            and now - self._synced_at < config["RECIPE_INDEX_SYNC_INTERVAL"]
+        ):
+            return
+
+        # Only the first build has to block; later syncs are skipped if
+        # another thread is already running one.
+        if not self._lock.acquire(blocking=force or self._synced_at is None):
+            return
+
+        try:
+            retention = config["RECIPE_CHANGE_RETENTION"]
+            with Session(db.engine) as session:
+                if self._synced_at is None or now - self._synced_at > retention / 2:
+                    # Read first: changes logged while loading are picked up
+                    # again by the next sync.
+                    self._watermark = RecipeChange.newest(session)
+                    self.build(session)
+                else:
+                    changed_since = None
+                    if self._watermark is not None:
+                        # Overlap the previous sync so rows committed late by
+                        # another process are not missed.
+                        changed_since = self._watermark - timedelta(
+                            seconds=config["RECIPE_INDEX_SYNC_OVERLAP"]
+                        )
+
+                    recipe_ids, newest = RecipeChange.changed_since(
+                        session, changed_since
+                    )
+                    if len(recipe_ids) > self.MAX_REFRESH:
+                        self.build(session)
+                    elif recipe_ids:
+                        self.refresh(session, recipe_ids)
+                    if newest is not None and (
+                        self._watermark is None or newest > self._watermark
+                    ):
+                        self._watermark = newest
+
+                self._synced_at = now
+                self.delete_expired(session, now)
+        finally:
+            self._lock.release()
+
+    def delete_expired(self, session, now):
+        config = current_app.config
+
+        if self._watermark is None or (
+            self._pruned_at is not None
+            and now - self._pruned_at < config["RECIPE_CHANGE_PRUNE_INTERVAL"]
+        ):
+            return
+
+        self._pruned_at = now
+        RecipeChange.delete_before(
+            session,
+            self._watermark - timedelta(seconds=config["RECIPE_CHANGE_RETENTION"]),
+        )
@@ -0,0 +1,147 @@
+"""Structured ingredients and the "what can I cook with" index
+
+``Recipe.ingredients`` stays free text. Each entry (split on commas, semicolons
+and new lines) is normalized to a bare ingredient name, "2 cups of Tomatoes"
+becoming "tomato", and stored in ``recipe_ingredient``. Published recipes are
+also kept in an in-process inverted index, so ingredient queries never touch
+the recipe table.
+
+Every process applies its own commits to its index, and catches up with the
+other processes' commits through ``index_sync``, one changed recipe at a time.
+"""
+
+import heapq
+import re
+import threading
+from collections import Counter, defaultdict
+
+from search import stem
+
+SEPARATOR_RE = re.compile(r"[,;\n]+")
+WORD_RE = re.compile(r"[a-z]+")
+PARENTHESES_RE = re.compile(r"\([^)]*\)")
+
+# Singular, as compared after stemming.
+UNITS = {
+    "a",
+    "an",
+    "bunch",
+    "can",
+    "clove",
+    "cup",
+    "dash",
+    "g",
+    "gram",
+    "handful",
+    "kg",
+    "l",
+    "lb",
+    "litre",
+    "liter",
+    "ml",
+    "of",
+    "ounce",
+    "oz",
+    "pinch",
+    "pound",
+    "slice",
+    "tablespoon",
+    "tbsp",
+    "teaspoon",
+    "tsp",
+}
+
+MAX_INGREDIENT_LENGTH = 100
+
+
+def normalize_ingredient(text):
+    words = [
+        stem(word) for word in WORD_RE.findall(PARENTHESES_RE.sub(" ", text.lower()))
+    ]
+
+    # Quantities are already gone; drop the units and fillers in front.
+    while words and words[0] in UNITS:
+        words.pop(0)
+
+    return " ".join(words)[:MAX_INGREDIENT_LENGTH] or None
+
+
+def parse_ingredients(text):
+    if not text:
+        return set()
+
+    return {
+        ingredient
+        for ingredient in map(normalize_ingredient, SEPARATOR_RE.split(text))
+        if ingredient
+    }
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(set)
+        self._recipes = {}
+
+    def build(self, rows):
+        """Rebuild from ``(recipe_id, ingredient)`` rows of published recipes."""
+        recipes = defaultdict(set)
+        for recipe_id, ingredient in rows:
+            recipes[recipe_id].add(ingredient)
+
+        postings = defaultdict(set)
+        for recipe_id, ingredients in recipes.items():
+            for ingredient in ingredients:
+                postings[ingredient].add(recipe_id)
+
+        with self._lock:
+            self._postings = postings
+            self._recipes = {
+                recipe_id: frozenset(ingredients)
+                for recipe_id, ingredients in recipes.items()
+            }
+
+    def apply(self, updates):
+        """Apply committed ``{recipe_id: ingredients or None}`` changes, None
+        for a recipe that is gone or no longer published."""
+        with self._lock:
+            for recipe_id, ingredients in updates.items():
+                self._remove(recipe_id)
+                if ingredients:
+                    self._add(recipe_id, ingredients)
+
+    def search(self, have, limit):
+        """Return up to ``limit`` ``(recipe_id, matched, total)`` tuples for
+        recipes sharing an ingredient with ``have``, best coverage first."""
+        with self._lock:
+            matched = Counter()
+            for ingredient in have:
+                matched.update(self._postings.get(ingredient, ()))
+
+            totals = {recipe_id: len(self._recipes[recipe_id]) for recipe_id in matched}
+
+        return heapq.nsmallest(
+            limit,
+            (
+                (recipe_id, count, totals[recipe_id])
+                for recipe_id, count in matched.items()
+            ),
+            key=lambda match: (-match[1] / match[2], -match[1], match[0]),
+        )
+
+    def _add(self, recipe_id, ingredients):
+        self._recipes[recipe_id] = frozenset(ingredients)
+        for ingredient in ingredients:
+            self._postings[ingredient].add(recipe_id)
+
+    def _remove(self, recipe_id):
+        for ingredient in self._recipes.pop(recipe_id, ()):
+            posting = self._postings.get(ingredient)
+            if posting is None:
+                continue
+            posting.discard(recipe_id)
+            if not posting:
+                del self._postings[ingredient]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,197 @@
+"""Per-request timings and Prometheus metrics
+
+SQL statements are timed through engine events, schema dumps through
+``timed("ser")`` and response cache reads by ``cache_backends``. Each request
+gets a ``Server-Timing`` header, and ``/metrics`` (off unless
+``METRICS_ENDPOINT``) serves per-route latency histograms in the Prometheus
+text format. Metrics are per process.
+"""
+
+import bisect
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+
+from flask import abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds, as in the Prometheus client defaults.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_query_count = g.get("sql_query_count", 0) + 1
+        conn.info["query_start"] = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("query_start", None)
+    if has_request_context() and start is not None:
+        add_timing("db", time.perf_counter() - start)
+
+
+def query_count():
+    return g.get("sql_query_count", 0)
+
+
+def add_timing(metric, seconds):
+    timings = g.setdefault("timings", {})
+    timings[metric] = timings.get(metric, 0.0) + seconds
+
+
+@contextmanager
+def timed(metric):
+    # Nested dumps (a schema inside a schema) are only counted once.
+    if not has_request_context() or metric in g.setdefault("timing_active", set()):
+        yield
+        return
+
+    g.timing_active.add(metric)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(metric, time.perf_counter() - start)
+        g.timing_active.discard(metric)
+
+
+def record_cache_read(key, hit, seconds):
+    if not has_request_context():
+        return
+
+    add_timing("cache", seconds)
+
+    # Generation lookups are bookkeeping; the response key decides hit/miss.
+    if not key.startswith("generation:"):
+        g.cache_status = "hit" if hit and g.get("cache_status") != "miss" else "miss"
+
+
+def server_timing():
+    timings = g.get("timings", {})
+    entries = []
+
+    if "db" in timings or query_count():
+        entries.append(
+            f'db;dur={timings.get("db", 0.0) * 1000:.2f};desc="{query_count()} queries"'
+        )
+    if "ser" in timings:
+        entries.append(f"ser;dur={timings['ser'] * 1000:.2f}")
+    if "cache" in timings:
+        entries.append(
+            f"cache;desc={g.get('cache_status', 'none')};dur={timings['cache'] * 1000:.2f}"
+        )
+
+    entries.append(f"total;dur={(time.perf_counter() - g.request_start) * 1000:.2f}")
+
+    return ", ".join(entries)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def collect(self):
+        with self._lock:
+            return [
+                (labels, list(counts), count, total)
+                for labels, (counts, count, total) in sorted(self._series.items())
+            ]
+
+
+request_duration = Histogram()
+
+
+def format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render_metrics():
+    name = "smilecook_request_duration_seconds"
+    lines = [
+        f"# HELP {name} Request latency by route.",
+        f"# TYPE {name} histogram",
+    ]
+
+    for labels, counts, count, total in request_duration.collect():
+        cumulative = 0
+        for bound, bucket_count in zip(request_duration.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{format_labels(labels, le='+Inf')} {count}")
+        lines.append(f"{name}_count{format_labels(labels)} {count}")
+        lines.append(f"{name}_sum{format_labels(labels)} {total}")
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        abort(HTTPStatus.UNAUTHORIZED)
+
+    return current_app.response_class(
+        render_metrics(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+def init_app(app):
+    if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+
+    if app.config.get("METRICS_ENDPOINT"):
+        app.add_url_rule("/metrics", "metrics", metrics)
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def add_timing_headers(response):
+        if "request_start" not in g:
+            return response
+
+        if app.config.get("SQL_QUERY_COUNT_HEADER"):
+            response.headers["X-SQL-Query-Count"] = str(query_count())
+
+        if app.config.get("SERVER_TIMING_HEADER"):
+            response.headers["Server-Timing"] = server_timing()
+
+        if request.url_rule is not None and request.endpoint != "metrics":
+            labels = (
+                ("method", request.method),
+                ("route", request.url_rule.rule),
+                ("status", response.status_code),
+            )
+            request_duration.observe(labels, time.perf_counter() - g.request_start)
+
+        return response
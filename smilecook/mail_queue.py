@@ -0,0 +1,117 @@
+import logging
+import threading
+
+import requests
+
+from extensions import db
+from mailgun import MailgunApi
+from models.mail import MailJob
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    """Outbound mail spooled in the ``mail_job`` table.
+
+    ``enqueue`` only inserts a row. A daemon thread, started on first use, or
+    ``flask send-queued-mail`` drains due jobs in batches over one pooled
+    Mailgun session and retries failures with exponential backoff. Workers
+    in several processes each claim their own jobs.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.mailgun = None
+        self._worker = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.mailgun = MailgunApi(
+            domain=app.config["MAILGUN_DOMAIN"],
+            api_key=app.config["MAILGUN_API_KEY"],
+            api_url=app.config["MAILGUN_API_URL"],
+            timeout=app.config["MAILGUN_TIMEOUT"],
+        )
+
+    def enqueue(self, to, subject, text, html=None):
+        job = MailJob(recipient=to, subject=subject, text=text, html=html)
+        job.save()
+
+        if self.app.config["MAIL_QUEUE_WORKER"]:
+            self.start_worker()
+            self._wakeup.set()
+
+        return job
+
+    def drain(self, batch_size=None):
+        config = self.app.config
+        jobs = MailJob.claim_due(
+            limit=batch_size or config["MAIL_QUEUE_BATCH_SIZE"],
+            lease=config["MAIL_QUEUE_CLAIM_TIMEOUT"],
+            max_attempts=config["MAIL_QUEUE_MAX_ATTEMPTS"],
+        )
+
+        for job in jobs:
+            try:
+                response = self.mailgun.send_email(
+                    to=job.recipient, subject=job.subject, text=job.text, html=job.html
+                )
+                response.raise_for_status()
+            except requests.RequestException as error:
+                status = getattr(error.response, "status_code", None)
+                job.mark_failed(
+                    error,
+                    max_attempts=config["MAIL_QUEUE_MAX_ATTEMPTS"],
+                    backoff=config["MAIL_QUEUE_BACKOFF"],
+                    # Mailgun rejected the message itself, retrying will not help
+                    permanent=status == 400,
+                )
+            else:
+                job.mark_sent()
+
+            # A crash later in the batch must not send this one again.
+            db.session.commit()
+
+        return len(jobs)
+
+    def drain_all(self):
+        sent = 0
+        batch_size = self.app.config["MAIL_QUEUE_BATCH_SIZE"]
+
+        while True:
+            drained = self.drain(batch_size)
+            sent += drained
+            if drained < batch_size:
+                return sent
+
+    def start_worker(self):
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+
+            self._worker = threading.Thread(
+                target=self.run, name="mail-queue", daemon=True
+            )
+            self._worker.start()
+
+    def run(self):
+        while True:
+            self._wakeup.wait(timeout=self.app.config["MAIL_QUEUE_POLL_INTERVAL"])
+            self._wakeup.clear()
+
+            with self.app.app_context():
+                try:
+                    self.drain_all()
+                except Exception:
+                    logger.exception("Failed to drain the mail queue")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+
+mail_queue = MailQueue()
@@ -1,13 +1,20 @@
 import requests
+from requests.adapters import HTTPAdapter
 
 
 class MailgunApi:
     API_URL = "https://api.mailgun.net/v3/{}/messages"
 
-    def __init__(self, domain, api_key) -> None:
+    def __init__(self, domain, api_key, api_url=None, timeout=10) -> None:
         self.domain = domain
         self.api_key = api_key
-        self.base_url = self.API_URL.format(self.domain)
+        self.base_url = (api_url or self.API_URL).format(self.domain)
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.auth = ("api", self.api_key)
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=4))
 
     def send_email(self, to, subject, text, html=None):
         if not isinstance(to, (list, tuple)):
@@ -22,4 +29,4 @@ class MailgunApi:
             "html": html,
         }
 
-        return requests.post(url=self.base_url, auth=("api", self.api_key), data=data)
+        return self.session.post(url=self.base_url, data=data, timeout=self.timeout)
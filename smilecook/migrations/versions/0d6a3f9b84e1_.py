@@ -0,0 +1,51 @@
+"""outbound mail queue
+
+Revision ID: 0d6a3f9b84e1
+Revises: e41c0a7d5b92
+Create Date: 2026-10-18 12:20:09.641177
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0d6a3f9b84e1"
+down_revision = "e41c0a7d5b92"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "mail_job",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("recipient", sa.String(length=200), nullable=False),
+        sa.Column("subject", sa.String(length=200), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("html", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_mail_job_status_next_attempt_at",
+        "mail_job",
+        ["status", "next_attempt_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_mail_job_status_next_attempt_at", table_name="mail_job")
+    op.drop_table("mail_job")
@@ -0,0 +1,48 @@
+"""user recipe counters
+
+Revision ID: 3f7b9e2a6c14
+Revises: 9a4d2c7e1f58
+Create Date: 2026-10-18 21:04:52.663102
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3f7b9e2a6c14"
+down_revision = "9a4d2c7e1f58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "user",
+        sa.Column(
+            "published_recipe_count", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    op.add_column(
+        "user",
+        sa.Column(
+            "draft_recipe_count", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+
+    op.execute("""
+        UPDATE "user" SET
+            published_recipe_count = (
+                SELECT count(*) FROM recipe
+                WHERE recipe.user_id = "user".id AND recipe.is_publish IS TRUE
+            ),
+            draft_recipe_count = (
+                SELECT count(*) FROM recipe
+                WHERE recipe.user_id = "user".id AND recipe.is_publish IS NOT TRUE
+            )
+        """)
+
+
+def downgrade():
+    op.drop_column("user", "draft_recipe_count")
+    op.drop_column("user", "published_recipe_count")
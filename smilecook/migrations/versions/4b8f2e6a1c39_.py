@@ -0,0 +1,39 @@
+"""recipe change log
+
+Revision ID: 4b8f2e6a1c39
+Revises: e3a7b5c91d04
+Create Date: 2026-10-19 14:02:51.730164
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "4b8f2e6a1c39"
+down_revision = "e3a7b5c91d04"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "recipe_change",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("recipe_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "changed_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_recipe_change_changed_at", "recipe_change", ["changed_at"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_recipe_change_changed_at", table_name="recipe_change")
+    op.drop_table("recipe_change")
@@ -0,0 +1,36 @@
+"""revoked token store
+
+Revision ID: 5c8e1f2a7d63
+Revises: 0d6a3f9b84e1
+Create Date: 2026-10-18 18:30:41.215904
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5c8e1f2a7d63"
+down_revision = "0d6a3f9b84e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "revoked_token",
+        sa.Column("jti", sa.String(length=36), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "revoked_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index("ix_revoked_token_revoked_at", "revoked_token", ["revoked_at"])
+    op.create_index("ix_revoked_token_expires_at", "revoked_token", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_revoked_token_expires_at", table_name="revoked_token")
+    op.drop_index("ix_revoked_token_revoked_at", table_name="revoked_token")
+    op.drop_table("revoked_token")
@@ -0,0 +1,75 @@
+"""range filter columns on published recipe indexes
+
+Revision ID: 7d1c5f3e8b26
+Revises: c62e8d4b1a07
+Create Date: 2026-10-18 23:02:11.590317
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "7d1c5f3e8b26"
+down_revision = "c62e8d4b1a07"
+branch_labels = None
+depends_on = None
+
+
+published = sa.column("is_publish").is_(True)
+
+INDEXES = {
+    "ix_recipe_published_created_at": (
+        ["created_at", "id"],
+        ["cook_time", "num_of_servings"],
+    ),
+    "ix_recipe_published_cook_time": (["cook_time", "id"], ["num_of_servings"]),
+    "ix_recipe_published_num_of_servings": (["num_of_servings", "id"], ["cook_time"]),
+    "ix_recipe_published_id": (["id"], ["cook_time", "num_of_servings"]),
+}
+
+
+def recreate(with_filters):
+    for name, (columns, filters) in INDEXES.items():
+        op.drop_index(name, table_name="recipe")
+        op.create_index(
+            name,
+            "recipe",
+            columns + filters if with_filters else columns,
+            sqlite_where=published,
+        )
+
+
+def recreate_concurrently(with_filters):
+    """Build each replacement next to the index it replaces, so queries keep
+    an index and writes are never blocked, then swap the names."""
+    with op.get_context().autocommit_block():
+        for name, (columns, filters) in INDEXES.items():
+            building = f"{name}_new"
+
+            # IF EXISTS: an interrupted run may have left an invalid
+            # replacement behind, or already dropped the original.
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {building}")
+            op.create_index(
+                building,
+                "recipe",
+                columns + filters if with_filters else columns,
+                postgresql_where=published,
+                postgresql_concurrently=True,
+            )
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            op.execute(f"ALTER INDEX {building} RENAME TO {name}")
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        recreate_concurrently(with_filters=True)
+    else:
+        recreate(with_filters=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        recreate_concurrently(with_filters=False)
+    else:
+        recreate(with_filters=False)
@@ -0,0 +1,33 @@
+"""stored image reference counts
+
+Revision ID: 9a4d2c7e1f58
+Revises: 5c8e1f2a7d63
+Create Date: 2026-10-18 20:12:09.418733
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9a4d2c7e1f58"
+down_revision = "5c8e1f2a7d63"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "stored_image",
+        sa.Column("folder", sa.String(length=20), nullable=False),
+        sa.Column("filename", sa.String(length=100), nullable=False),
+        sa.Column("refcount", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("folder", "filename"),
+    )
+
+
+def downgrade():
+    op.drop_table("stored_image")
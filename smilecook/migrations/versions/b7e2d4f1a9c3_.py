@@ -0,0 +1,64 @@
+"""recipe full-text search vector
+
+Revision ID: b7e2d4f1a9c3
+Revises: 523c23afa635
+Create Date: 2026-10-18 10:12:41.502318
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "b7e2d4f1a9c3"
+down_revision = "523c23afa635"
+branch_labels = None
+depends_on = None
+
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce({prefix}name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({prefix}description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce({prefix}ingredients, '')), 'C')
+"""
+
+
+def upgrade():
+    # Other databases use the in-process index in search.py.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.add_column(
+        "recipe", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True)
+    )
+    op.execute(f"""
+        CREATE FUNCTION recipe_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR.format(prefix="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """)
+    op.execute("""
+        CREATE TRIGGER recipe_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description, ingredients ON recipe
+        FOR EACH ROW EXECUTE FUNCTION recipe_search_vector_update()
+        """)
+    op.execute(f"UPDATE recipe SET search_vector = {SEARCH_VECTOR.format(prefix='')}")
+    op.create_index(
+        "ix_recipe_search_vector",
+        "recipe",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.drop_index("ix_recipe_search_vector", table_name="recipe")
+    op.execute("DROP TRIGGER recipe_search_vector_trigger ON recipe")
+    op.execute("DROP FUNCTION recipe_search_vector_update()")
+    op.drop_column("recipe", "search_vector")
@@ -0,0 +1,115 @@
+"""recipe ingredients
+
+Revision ID: c62e8d4b1a07
+Revises: 3f7b9e2a6c14
+Create Date: 2026-10-18 22:17:35.208461
+
+"""
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c62e8d4b1a07"
+down_revision = "3f7b9e2a6c14"
+branch_labels = None
+depends_on = None
+
+# A frozen copy of ingredients.parse_ingredients as of this revision, so the
+# backfill does not change when the app's parser does.
+SEPARATOR_RE = re.compile(r"[,;\n]+")
+WORD_RE = re.compile(r"[a-z]+")
+PARENTHESES_RE = re.compile(r"\([^)]*\)")
+UNITS = {
+    "a",
+    "an",
+    "bunch",
+    "can",
+    "clove",
+    "cup",
+    "dash",
+    "g",
+    "gram",
+    "handful",
+    "kg",
+    "l",
+    "lb",
+    "litre",
+    "liter",
+    "ml",
+    "of",
+    "ounce",
+    "oz",
+    "pinch",
+    "pound",
+    "slice",
+    "tablespoon",
+    "tbsp",
+    "teaspoon",
+    "tsp",
+}
+MAX_INGREDIENT_LENGTH = 100
+
+
+def stem(token):
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("oes"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def normalize_ingredient(text):
+    words = [
+        stem(word) for word in WORD_RE.findall(PARENTHESES_RE.sub(" ", text.lower()))
+    ]
+
+    while words and words[0] in UNITS:
+        words.pop(0)
+
+    return " ".join(words)[:MAX_INGREDIENT_LENGTH] or None
+
+
+def parse_ingredients(text):
+    if not text:
+        return set()
+
+    return {
+        ingredient
+        for ingredient in map(normalize_ingredient, SEPARATOR_RE.split(text))
+        if ingredient
+    }
+
+
+def upgrade():
+    recipe_ingredient = op.create_table(
+        "recipe_ingredient",
+        sa.Column("recipe_id", sa.Integer(), nullable=False),
+        sa.Column("ingredient", sa.String(length=100), nullable=False),
+        sa.ForeignKeyConstraint(["recipe_id"], ["recipe.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("recipe_id", "ingredient"),
+    )
+    op.create_index(
+        "ix_recipe_ingredient_ingredient",
+        "recipe_ingredient",
+        ["ingredient", "recipe_id"],
+    )
+
+    connection = op.get_bind()
+    recipes = connection.execute(sa.text("SELECT id, ingredients FROM recipe"))
+    rows = [
+        {"recipe_id": recipe_id, "ingredient": ingredient}
+        for recipe_id, text in recipes
+        for ingredient in sorted(parse_ingredients(text))
+    ]
+    if rows:
+        op.bulk_insert(recipe_ingredient, rows)
+
+
+def downgrade():
+    op.drop_index("ix_recipe_ingredient_ingredient", table_name="recipe_ingredient")
+    op.drop_table("recipe_ingredient")
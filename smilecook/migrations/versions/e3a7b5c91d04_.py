@@ -0,0 +1,28 @@
+"""stored image rendition readiness
+
+Revision ID: e3a7b5c91d04
+Revises: 7d1c5f3e8b26
+Create Date: 2026-10-19 10:41:27.203518
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e3a7b5c91d04"
+down_revision = "7d1c5f3e8b26"
+branch_labels = None
+depends_on = None
+
+
+# Run ``flask render-images`` afterwards: it records renditions that already
+# exist and renders the rest, uploads from before reference counting included.
+def upgrade():
+    op.add_column(
+        "stored_image", sa.Column("rendered_at", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("stored_image", "rendered_at")
@@ -0,0 +1,80 @@
+"""recipe list indexes
+
+Revision ID: e41c0a7d5b92
+Revises: b7e2d4f1a9c3
+Create Date: 2026-10-18 11:03:27.118604
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e41c0a7d5b92"
+down_revision = "b7e2d4f1a9c3"
+branch_labels = None
+depends_on = None
+
+
+published = sa.column("is_publish").is_(True)
+draft = sa.column("is_publish").is_(False)
+
+
+def upgrade():
+    op.create_index(
+        "ix_recipe_published_created_at",
+        "recipe",
+        ["created_at", "id"],
+        postgresql_where=published,
+        sqlite_where=published,
+    )
+    op.create_index(
+        "ix_recipe_published_cook_time",
+        "recipe",
+        ["cook_time", "id"],
+        postgresql_where=published,
+        sqlite_where=published,
+    )
+    op.create_index(
+        "ix_recipe_published_num_of_servings",
+        "recipe",
+        ["num_of_servings", "id"],
+        postgresql_where=published,
+        sqlite_where=published,
+    )
+    op.create_index(
+        "ix_recipe_published_id",
+        "recipe",
+        ["id"],
+        postgresql_where=published,
+        sqlite_where=published,
+    )
+    op.create_index(
+        "ix_recipe_user_id_created_at",
+        "recipe",
+        ["user_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_recipe_user_id_published_created_at",
+        "recipe",
+        ["user_id", "created_at", "id"],
+        postgresql_where=published,
+        sqlite_where=published,
+    )
+    op.create_index(
+        "ix_recipe_user_id_draft_created_at",
+        "recipe",
+        ["user_id", "created_at", "id"],
+        postgresql_where=draft,
+        sqlite_where=draft,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_recipe_user_id_draft_created_at", table_name="recipe")
+    op.drop_index("ix_recipe_user_id_published_created_at", table_name="recipe")
+    op.drop_index("ix_recipe_user_id_created_at", table_name="recipe")
+    op.drop_index("ix_recipe_published_id", table_name="recipe")
+    op.drop_index("ix_recipe_published_num_of_servings", table_name="recipe")
+    op.drop_index("ix_recipe_published_cook_time", table_name="recipe")
+    op.drop_index("ix_recipe_published_created_at", table_name="recipe")
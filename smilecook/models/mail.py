@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, select, update
+
+from extensions import db
+
+
+class MailJob(db.Model):
+    __tablename__ = "mail_job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(200), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    text = db.Column(db.Text(), nullable=False)
+    html = db.Column(db.Text())
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    attempts = db.Column(db.Integer(), nullable=False, default=0)
+    last_error = db.Column(db.String(500))
+    next_attempt_at = db.Column(
+        db.DateTime(),
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=db.func.now(),
+    )
+    sent_at = db.Column(db.DateTime())
+    created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
+
+    __table_args__ = (
+        db.Index("ix_mail_job_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    @classmethod
+    def claim_due(cls, limit, lease, max_attempts):
+        """Claim up to ``limit`` due jobs for ``lease`` seconds and return them.
+
+        The claim is a conditional ``UPDATE`` that moves ``next_attempt_at``
+        past now, so of two workers racing for a job only one gets it back,
+        on databases without ``SKIP LOCKED`` too. A job still ``sending`` when
+        its lease runs out (its worker died) is due again, and that counts as
+        an attempt, so a job that keeps killing its worker ends up failed."""
+        # A lagging replica would hide due jobs.
+        db.session().use_primary = True
+
+        now = datetime.utcnow()
+        due = (
+            cls.status.in_(("pending", "sending")),
+            cls.next_attempt_at <= now,
+        )
+        abandoned = cls.status == "sending"
+
+        db.session.execute(
+            update(cls)
+            .where(*due, abandoned, cls.attempts + 1 >= max_attempts)
+            .values(
+                status="failed",
+                attempts=cls.attempts + 1,
+                last_error="The worker stopped while sending",
+            )
+        )
+
+        candidates = db.session.scalars(
+            select(cls.id)
+            .where(*due)
+            .order_by(cls.next_attempt_at, cls.id)
+            .limit(limit)
+        ).all()
+        if not candidates:
+            db.session.commit()
+            return []
+
+        claimed = db.session.scalars(
+            update(cls)
+            .where(cls.id.in_(candidates), *due)
+            .values(
+                status="sending",
+                attempts=case((abandoned, cls.attempts + 1), else_=cls.attempts),
+                next_attempt_at=now + timedelta(seconds=lease),
+            )
+            .returning(cls.id)
+        ).all()
+        db.session.commit()
+
+        return cls.query.filter(cls.id.in_(claimed)).order_by(cls.id).all()
+
+    def mark_sent(self):
+        self.status = "sent"
+        self.sent_at = datetime.utcnow()
+        self.last_error = None
+
+    def mark_failed(self, error, max_attempts, backoff, permanent=False):
+        self.attempts += 1
+        self.last_error = str(error)[:500]
+
+        if permanent or self.attempts >= max_attempts:
+            self.status = "failed"
+        else:
+            self.status = "pending"
+            delay = min(backoff * 2 ** (self.attempts - 1), 60 * 60)
+            self.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+    def save(self):
+        db.session.add(self)
+        db.session.commit()
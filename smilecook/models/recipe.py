@@ -1,10 +1,62 @@
+import heapq
+import operator
+from collections import Counter
+from types import SimpleNamespace
+
 from extensions import db
-from sqlalchemy import asc, desc, or_
+from flask import abort
+from sqlalchemy import (
+    case,
+    event,
+    false,
+    insert,
+    inspect,
+    literal_column,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session, joinedload, object_session, selectinload
+
+from index_sync import IndexSync
+from ingredients import ingredient_index, parse_ingredients
+from models.recipe_change import RecipeChange
+from models.recipe_ingredient import RecipeIngredient
+from models.user import User
+from pagination import (
+    CursorError,
+    CursorPagination,
+    Page,
+    decode_cursor,
+    keyset_paginate,
+    nulls_key,
+    order_by,
+    value_type,
+)
+from search import (
+    Document,
+    search_index,
+    snapshot,
+    ts_match,
+    ts_rank,
+    uses_full_text,
+)
 
 
 class Recipe(db.Model):
     __tablename__ = "recipe"
 
+    MAX_PER_PAGE = 30
+    EDITABLE_FIELDS = (
+        "name",
+        "description",
+        "num_of_servings",
+        "cook_time",
+        "directions",
+        "ingredients",
+    )
+    AUTHOR_FIELDS = ("username", "avatar_image", "created_at", "updated_at")
+
     id = db.Column(db.Integer(), primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(100))
@@ -23,6 +75,61 @@ class Recipe(db.Model):
     cover_image = db.Column(db.String(100), default=None)
     user_id = db.Column(db.Integer(), db.ForeignKey("user.id"))
 
+    # The published indexes carry cook_time and num_of_servings after the sort
+    # key, so range filters are checked without reading the table row.
+    __table_args__ = (
+        db.Index(
+            "ix_recipe_published_created_at",
+            "created_at",
+            "id",
+            "cook_time",
+            "num_of_servings",
+            postgresql_where=is_publish.is_(True),
+            sqlite_where=is_publish.is_(True),
+        ),
+        db.Index(
+            "ix_recipe_published_cook_time",
+            "cook_time",
+            "id",
+            "num_of_servings",
+            postgresql_where=is_publish.is_(True),
+            sqlite_where=is_publish.is_(True),
+        ),
+        db.Index(
+            "ix_recipe_published_num_of_servings",
+            "num_of_servings",
+            "id",
+            "cook_time",
+            postgresql_where=is_publish.is_(True),
+            sqlite_where=is_publish.is_(True),
+        ),
+        db.Index(
+            "ix_recipe_published_id",
+            "id",
+            "cook_time",
+            "num_of_servings",
+            postgresql_where=is_publish.is_(True),
+            sqlite_where=is_publish.is_(True),
+        ),
+        db.Index("ix_recipe_user_id_created_at", "user_id", "created_at", "id"),
+        db.Index(
+            "ix_recipe_user_id_published_created_at",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=is_publish.is_(True),
+            sqlite_where=is_publish.is_(True),
+        ),
+        db.Index(
+            "ix_recipe_user_id_draft_created_at",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=is_publish.is_(False),
+            sqlite_where=is_publish.is_(False),
+        ),
+    )
+
     def data(self):
         return {
             "id": self.id,
@@ -34,58 +141,420 @@ class Recipe(db.Model):
             "user_id": self.user_id,
         }
 
-    @classmethod
-    def get_all_published(cls):
-        return cls.query.filter_by(is_publish=True).all()
-
     @classmethod
     def get_by_id(cls, recipe_id):
         return cls.query.filter_by(id=recipe_id).first()
 
     @classmethod
-    def get_all_by_user(cls, user_id, page, per_page, visibility="public"):
+    def get_by_ids(cls, recipe_ids):
+        # One query, authors joined in.
+        return (
+            cls.query.options(joinedload(cls.user)).filter(cls.id.in_(recipe_ids)).all()
+        )
+
+    @classmethod
+    def published_query(cls):
+        return cls.query.options(selectinload(cls.user)).filter(
+            cls.is_publish.is_(True)
+        )
+
+    @classmethod
+    def user_query(cls, user_id, visibility="public"):
+        query = cls.query.options(selectinload(cls.user)).filter(cls.user_id == user_id)
+
         if visibility == "public":
-            return (
-                cls.query.filter_by(user_id=user_id, is_publish=True)
-                .order_by(desc(cls.created_at))
-                .paginate(page=page, per_page=per_page)
-            )
+            query = query.filter(cls.is_publish.is_(True))
         elif visibility == "private":
-            return (
-                cls.query.filter_by(user_id=user_id, is_publish=False)
-                .order_by(desc(cls.created_at))
-                .paginate(page=page, per_page=per_page)
+            query = query.filter(cls.is_publish.is_(False))
+
+        return query
+
+    @classmethod
+    def get_all_by_user(
+        cls,
+        user_id,
+        page,
+        per_page,
+        visibility="public",
+        keyset=False,
+        after=None,
+        before=None,
+        with_total=False,
+        total=None,
+    ):
+        """``total`` is the user's counter for ``visibility``; when given, no
+        count query is issued."""
+        query = cls.user_query(user_id=user_id, visibility=visibility)
+
+        if keyset:
+            return keyset_paginate(
+                query,
+                sort="created_at",
+                sort_column=cls.created_at,
+                id_column=cls.id,
+                order="desc",
+                per_page=per_page,
+                after=after,
+                before=before,
+                with_total=with_total,
+                total=total,
             )
-        else:
-            return (
-                cls.query.filter_by(user_id=user_id)
-                .order_by(desc(cls.created_at))
-                .paginate(page=page, per_page=per_page)
+
+        paginated = order_by(query, cls.created_at, cls.id, "desc").paginate(
+            page=page, per_page=per_page, count=total is None
+        )
+        if total is not None:
+            paginated.total = total
+
+        return paginated
+
+    @classmethod
+    def filter_ranges(
+        cls,
+        query,
+        sort_column=None,
+        min_cook_time=None,
+        max_cook_time=None,
+        min_servings=None,
+        max_servings=None,
+    ):
+        bounds = [
+            (cls.cook_time, min_cook_time, max_cook_time),
+            (cls.num_of_servings, min_servings, max_servings),
+        ]
+
+        # SQLite would rather seek a range on another column's index and
+        # sort every match than walk the sort index, which is much slower
+        # for wide ranges. "+ 0" keeps those bounds off the index choice;
+        # they are still checked against the sort index's trailing columns.
+        steer = query.session.get_bind().dialect.name == "sqlite"
+
+        for column, low, high in bounds:
+            if steer and column is not sort_column:
+                column = column + literal_column("0")
+            if low is not None:
+                query = query.filter(column >= low)
+            if high is not None:
+                query = query.filter(column <= high)
+
+        return query
+
+    @classmethod
+    def get_all_published(
+        cls,
+        q,
+        page,
+        per_page,
+        sort,
+        order,
+        keyset=False,
+        after=None,
+        before=None,
+        with_total=False,
+        **ranges,
+    ):
+        """``ranges`` are the inclusive bounds taken by ``filter_ranges``."""
+        per_page = min(cls.MAX_PER_PAGE, per_page)
+
+        if sort == "relevance" and not q:
+            sort = "created_at"
+
+        if sort == "relevance" and keyset:
+            raise CursorError("Cursor pagination is not supported for relevance")
+
+        if q and not uses_full_text(db.session):
+            return cls.search_listing(
+                q,
+                page=page,
+                per_page=per_page,
+                sort=sort,
+                order=order,
+                keyset=keyset,
+                after=after,
+                before=before,
+                with_total=with_total,
+                **ranges,
+            )
+
+        query = cls.published_query()
+        if q:
+            query, rank = cls.search(query, q)
+
+        sort_column = rank if sort == "relevance" else getattr(cls, sort)
+
+        query = cls.filter_ranges(query, sort_column=sort_column, **ranges)
+
+        if keyset:
+            return keyset_paginate(
+                query,
+                sort=sort,
+                sort_column=sort_column,
+                id_column=cls.id,
+                order=order,
+                per_page=per_page,
+                after=after,
+                before=before,
+                with_total=with_total,
             )
 
+        return order_by(query, sort_column, cls.id, order).paginate(
+            page=page, per_page=per_page
+        )
+
+    @classmethod
+    def search(cls, query, q):
+        """PostgreSQL full-text match and rank. Other databases go through
+        ``search_listing``."""
+        return query.filter(ts_match(q)), ts_rank(q)
+
     @classmethod
-    def get_all_published(cls, q, page, per_page, sort, order):
-        per_page = min(30, per_page)
-        keyword = f"%{q}%"
+    def search_listing(
+        cls,
+        q,
+        page,
+        per_page,
+        sort,
+        order,
+        keyset=False,
+        after=None,
+        before=None,
+        with_total=False,
+        **ranges,
+    ):
+        """``get_all_published`` for the in-process search index: the matches
+        are filtered, ranked and paged in Python, and only the recipes on the
+        page are loaded."""
+        search_sync.sync()
+
+        dialect = db.session.get_bind().dialect.name
+        matches = [
+            (listing, score)
+            for listing, score in search_index.matches(q)
+            if in_ranges(listing, **ranges)
+        ]
+
+        # Ordered like order_by(): sort value, then id.
+        def sort_key(match):
+            listing, score = match
+            value = score if sort == "relevance" else getattr(listing, sort)
+            return nulls_key(value, dialect), listing.id
+
+        ascending = order == "asc"
+
+        if not keyset:
+            if page < 1:
+                abort(404)
+            pick = heapq.nsmallest if ascending else heapq.nlargest
+            chosen = pick(page * per_page, matches, key=sort_key)
+            chosen = chosen[(page - 1) * per_page :]
+            # Past the last page, as Flask-SQLAlchemy's paginate().
+            if not chosen and page != 1:
+                abort(404)
 
-        if order == "asc":
-            sort_logic = asc(getattr(cls, sort))
+            return Page(cls.load_listed(chosen), page, per_page, len(matches))
+
+        token = before or after or None
+        backwards = bool(before)
+        if backwards:
+            ascending = not ascending
+
+        total = len(matches) if with_total else None
+        if token is not None:
+            value, id = decode_cursor(token, sort, value_type(getattr(cls, sort)))
+            cursor = nulls_key(value, dialect), id
+            compare = operator.gt if ascending else operator.lt
+            matches = [match for match in matches if compare(sort_key(match), cursor)]
+
+        pick = heapq.nsmallest if ascending else heapq.nlargest
+        chosen = pick(per_page + 1, matches, key=sort_key)
+
+        has_more = len(chosen) > per_page
+        chosen = chosen[:per_page]
+
+        if backwards:
+            chosen.reverse()
+            has_prev, has_next = has_more, True
         else:
-            sort_logic = desc(getattr(cls, sort))
+            has_prev, has_next = token is not None, has_more
+
+        return CursorPagination(
+            items=cls.load_listed(chosen),
+            per_page=per_page,
+            sort=sort,
+            sort_key=lambda recipe: (getattr(recipe, sort), recipe.id),
+            has_prev=has_prev,
+            has_next=has_next,
+            total=total,
+        )
+
+    @classmethod
+    def load_listed(cls, matches):
+        """Load the recipes of ``(listing, score)`` matches, in their order."""
+        ids = [listing.id for listing, _ in matches]
+        if not ids:
+            return []
 
+        recipes = {
+            recipe.id: recipe
+            for recipe in cls.published_query().filter(cls.id.in_(ids))
+        }
+
+        # One unpublished since the index last synced is left out.
+        return [recipes[id] for id in ids if id in recipes]
+
+    @classmethod
+    def find_by_ingredients(cls, have, limit):
+        """Rank published recipes by the share of their ingredients in
+        ``have``, from the in-memory index. See ``ingredients``."""
+        ingredient_sync.sync()
+
+        return ingredient_index.search(have, limit)
+
+    @classmethod
+    def search_documents(cls, session):
+        return session.query(
+            cls.id, *(getattr(cls, field) for field in Document._fields)
+        )
+
+    @classmethod
+    def published_ingredients(cls, session):
         return (
-            cls.query.filter(
-                or_(
-                    cls.name.ilike(keyword),
-                    cls.description.ilike(keyword),
-                    cls.ingredients.ilike(keyword),
+            session.query(RecipeIngredient.recipe_id, RecipeIngredient.ingredient)
+            .join(cls, cls.id == RecipeIngredient.recipe_id)
+            .filter(cls.is_publish.is_(True))
+        )
+
+    @classmethod
+    def bulk_insert(cls, rows):
+        """Insert ``rows`` (dicts of column values) in one executemany and
+        return the new ids in the same order."""
+        inserted = db.session.execute(
+            insert(cls).returning(cls.id, cls.created_at, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        ids = [recipe_id for recipe_id, _ in inserted]
+
+        # Bulk inserts skip the mapper events below.
+        RecipeChange.record(db.session.connection(), ids)
+        counts = Counter((row["user_id"], bool(row.get("is_publish"))) for row in rows)
+        for (user_id, is_publish), count in counts.items():
+            User.adjust_recipe_counts(
+                db.session.connection(),
+                user_id,
+                published=count if is_publish else 0,
+                draft=0 if is_publish else count,
+            )
+
+        ingredient_rows = []
+        for (recipe_id, created_at), row in zip(inserted, rows):
+            ingredients = parse_ingredients(row.get("ingredients"))
+            ingredient_rows.extend(
+                {"recipe_id": recipe_id, "ingredient": ingredient}
+                for ingredient in sorted(ingredients)
+            )
+            if row.get("is_publish"):
+                queue_ingredient_update(db.session, recipe_id, ingredients)
+
+            queue_search_document(
+                db.session,
+                recipe_id,
+                Document(
+                    **{
+                        **{field: row.get(field) for field in Document._fields},
+                        "created_at": created_at,
+                    }
                 ),
-                (cls.is_publish.is_(True)),
             )
-            .order_by(sort_logic)
-            .paginate(page=page, per_page=per_page)
+
+        if ingredient_rows:
+            db.session.execute(insert(RecipeIngredient), ingredient_rows)
+
+        db.session.commit()
+
+        return ids
+
+    @classmethod
+    def export(cls, user_id, visibility="public", batch_size=500):
+        """Yield the user's recipes in lists of ``batch_size``, streamed from a
+        server-side cursor where the driver supports one."""
+        statement = (
+            cls.user_query(user_id=user_id, visibility=visibility)
+            .order_by(cls.id)
+            .statement.execution_options(yield_per=batch_size)
+        )
+
+        yield from db.session.scalars(statement).partitions()
+
+    @classmethod
+    def update_owned(cls, recipe_id, user_id, values):
+        """Apply ``values`` and commit with one ``UPDATE ... WHERE id AND
+        user_id RETURNING``, the author included. Returns a read-only snapshot,
+        or None when ``user_id`` has no such recipe.
+
+        Mapper events do not fire for this statement, so the change log, the
+        ingredient rows and the search, ingredient and feed queues are handled
+        here."""
+        # The feed module imports this one.
+        from feed import queue_feed_update
+
+        table = cls.__table__
+        users = User.__table__.alias("author")
+
+        changed = or_(
+            false(),
+            *(
+                table.c[field].is_distinct_from(value)
+                for field, value in values.items()
+            ),
+        )
+        author = [
+            select(users.c[field])
+            .where(users.c.id == table.c.user_id)
+            .correlate(table)
+            .scalar_subquery()
+            .label(f"author_{field}")
+            for field in cls.AUTHOR_FIELDS
+        ]
+        statement = (
+            update(table)
+            .where(table.c.id == recipe_id, table.c.user_id == user_id)
+            .values(
+                **values,
+                # Like a flush, an edit that changes nothing keeps updated_at.
+                updated_at=case((changed, db.func.now()), else_=table.c.updated_at),
+            )
+            .returning(*table.c, *author)
         )
 
+        row = db.session.execute(statement).mappings().first()
+        if row is None:
+            db.session.rollback()
+            return None
+
+        recipe = SimpleNamespace(
+            **{column.name: row[column.name] for column in table.c},
+            user=SimpleNamespace(
+                id=row["user_id"],
+                **{field: row[f"author_{field}"] for field in cls.AUTHOR_FIELDS},
+            ),
+        )
+
+        session = db.session()
+        RecipeChange.record(session.connection(), [recipe.id])
+        if "ingredients" in values:
+            ingredients = parse_ingredients(recipe.ingredients)
+            RecipeIngredient.replace(session.connection(), recipe.id, ingredients)
+            if recipe.is_publish:
+                queue_ingredient_update(session, recipe.id, ingredients)
+
+        queue_search_document(session, recipe.id, snapshot(recipe))
+        if recipe.is_publish:
+            queue_feed_update(session, "feed_recipes", recipe.id)
+
+        db.session.commit()
+
+        return recipe
+
     def save(self):
         db.session.add(self)
         db.session.commit()
@@ -93,3 +562,181 @@ class Recipe(db.Model):
     def delete(self):
         db.session.delete(self)
         db.session.commit()
+
+
+def in_ranges(
+    listing,
+    min_cook_time=None,
+    max_cook_time=None,
+    min_servings=None,
+    max_servings=None,
+):
+    """``Recipe.filter_ranges`` for a search index listing."""
+    bounds = [
+        (listing.cook_time, min_cook_time, max_cook_time),
+        (listing.num_of_servings, min_servings, max_servings),
+    ]
+
+    for value, low, high in bounds:
+        # As in SQL, a NULL never satisfies a bound.
+        if value is None and (low is not None or high is not None):
+            return False
+        if low is not None and value < low:
+            return False
+        if high is not None and value > high:
+            return False
+
+    return True
+
+
+def count_recipe(connection, user_id, is_publish, sign):
+    if is_publish:
+        User.adjust_recipe_counts(connection, user_id, published=sign)
+    else:
+        User.adjust_recipe_counts(connection, user_id, draft=sign)
+
+
+@event.listens_for(Recipe, "after_insert")
+def count_insert(mapper, connection, target):
+    count_recipe(connection, target.user_id, target.is_publish, 1)
+
+
+@event.listens_for(Recipe, "after_update")
+def count_update(mapper, connection, target):
+    state = inspect(target)
+    user_history = state.attrs.user_id.history
+    publish_history = state.attrs.is_publish.history
+    if not (user_history.has_changes() or publish_history.has_changes()):
+        return
+
+    old_user_id = (user_history.deleted or [target.user_id])[0]
+    old_is_publish = (publish_history.deleted or [target.is_publish])[0]
+
+    count_recipe(connection, old_user_id, old_is_publish, -1)
+    count_recipe(connection, target.user_id, target.is_publish, 1)
+
+
+@event.listens_for(Recipe, "after_delete")
+def count_delete(mapper, connection, target):
+    count_recipe(connection, target.user_id, target.is_publish, -1)
+
+
+@event.listens_for(Recipe, "after_insert")
+@event.listens_for(Recipe, "after_update")
+@event.listens_for(Recipe, "after_delete")
+def record_change(mapper, connection, target):
+    RecipeChange.record(connection, [target.id])
+
+
+def queue_ingredient_update(session, recipe_id, ingredients):
+    session.info.setdefault("ingredient_updates", {})[recipe_id] = ingredients
+
+
+@event.listens_for(Recipe, "after_insert")
+def add_ingredients(mapper, connection, target):
+    ingredients = parse_ingredients(target.ingredients)
+    RecipeIngredient.replace(connection, target.id, ingredients)
+
+    if target.is_publish:
+        queue_ingredient_update(object_session(target), target.id, ingredients)
+
+
+@event.listens_for(Recipe, "after_update")
+def update_ingredients(mapper, connection, target):
+    state = inspect(target)
+    ingredients_changed = state.attrs.ingredients.history.has_changes()
+    if not (ingredients_changed or state.attrs.is_publish.history.has_changes()):
+        return
+
+    ingredients = parse_ingredients(target.ingredients)
+    if ingredients_changed:
+        RecipeIngredient.replace(connection, target.id, ingredients)
+
+    queue_ingredient_update(
+        object_session(target), target.id, ingredients if target.is_publish else None
+    )
+
+
+@event.listens_for(Recipe, "before_delete")
+def delete_ingredients(mapper, connection, target):
+    RecipeIngredient.replace(connection, target.id, None)
+    queue_ingredient_update(object_session(target), target.id, None)
+
+
+def refresh_ingredients(session, recipe_ids):
+    updates = {recipe_id: set() for recipe_id in recipe_ids}
+    for recipe_id, ingredient in Recipe.published_ingredients(session).filter(
+        RecipeIngredient.recipe_id.in_(recipe_ids)
+    ):
+        updates[recipe_id].add(ingredient)
+
+    ingredient_index.apply(updates)
+
+
+ingredient_sync = IndexSync(
+    build=lambda session: ingredient_index.build(Recipe.published_ingredients(session)),
+    refresh=refresh_ingredients,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_ingredient_updates(session):
+    updates = session.info.pop("ingredient_updates", None)
+    if updates:
+        ingredient_index.apply(updates)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_ingredient_updates(session):
+    session.info.pop("ingredient_updates", None)
+
+
+def queue_search_document(session, recipe_id, document):
+    session.info.setdefault("search_updates", {})[recipe_id] = document
+
+
+@event.listens_for(Recipe, "after_insert")
+@event.listens_for(Recipe, "after_update")
+def queue_search_update(mapper, connection, target):
+    queue_search_document(object_session(target), target.id, snapshot(target))
+
+
+@event.listens_for(Recipe, "after_delete")
+def queue_search_delete(mapper, connection, target):
+    queue_search_document(object_session(target), target.id, None)
+
+
+def refresh_search_documents(session, recipe_ids):
+    documents = {
+        row.id: row
+        for row in Recipe.search_documents(session).filter(Recipe.id.in_(recipe_ids))
+    }
+    for recipe_id in recipe_ids:
+        if recipe_id in documents:
+            search_index.add(recipe_id, documents[recipe_id])
+        else:
+            search_index.remove(recipe_id)
+
+
+search_sync = IndexSync(
+    build=lambda session: search_index.build(Recipe.search_documents(session)),
+    refresh=refresh_search_documents,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_search_updates(session):
+    updates = session.info.pop("search_updates", None)
+    if not updates or not search_index.built:
+        return
+
+    for recipe_id, document in updates.items():
+        if document is None:
+            search_index.remove(recipe_id)
+        else:
+            search_index.add(recipe_id, document)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_search_updates(session):
+    session.info.pop("search_updates", None)
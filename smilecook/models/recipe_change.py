@@ -0,0 +1,55 @@
+from sqlalchemy import func, select
+
+from extensions import db
+
+
+class RecipeChange(db.Model):
+    """One row per committed write to a recipe, deletes included, so every
+    process can catch its in-memory recipe indexes up with the others."""
+
+    __tablename__ = "recipe_change"
+
+    id = db.Column(db.Integer(), primary_key=True)
+    # No foreign key: the row has to outlive a deleted recipe.
+    recipe_id = db.Column(db.Integer(), nullable=False)
+    changed_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
+
+    __table_args__ = (db.Index("ix_recipe_change_changed_at", "changed_at"),)
+
+    @classmethod
+    def record(cls, connection, recipe_ids):
+        """Log ``recipe_ids`` inside the caller's transaction."""
+        connection.execute(
+            cls.__table__.insert(),
+            [{"recipe_id": recipe_id} for recipe_id in recipe_ids],
+        )
+
+    @classmethod
+    def newest(cls, session):
+        return session.scalar(select(func.max(cls.changed_at)))
+
+    @classmethod
+    def changed_since(cls, session, changed_since=None):
+        """Return the ids changed since ``changed_since`` and the newest
+        ``changed_at`` among them."""
+        query = select(cls.recipe_id, cls.changed_at)
+        if changed_since is not None:
+            query = query.where(cls.changed_at >= changed_since)
+
+        recipe_ids = set()
+        newest = None
+        for recipe_id, changed_at in session.execute(query):
+            recipe_ids.add(recipe_id)
+            if newest is None or changed_at > newest:
+                newest = changed_at
+
+        return recipe_ids, newest
+
+    @classmethod
+    def delete_before(cls, session, changed_at):
+        count = session.execute(
+            cls.__table__.delete().where(cls.changed_at < changed_at)
+        ).rowcount
+        session.commit()
+
+        return count
@@ -0,0 +1,31 @@
+from extensions import db
+
+
+class RecipeIngredient(db.Model):
+    __tablename__ = "recipe_ingredient"
+
+    recipe_id = db.Column(
+        db.Integer(),
+        db.ForeignKey("recipe.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    ingredient = db.Column(db.String(100), primary_key=True)
+
+    __table_args__ = (
+        db.Index("ix_recipe_ingredient_ingredient", "ingredient", "recipe_id"),
+    )
+
+    @classmethod
+    def replace(cls, connection, recipe_id, ingredients):
+        """Rewrite a recipe's rows inside the caller's transaction."""
+        table = cls.__table__
+
+        connection.execute(table.delete().where(table.c.recipe_id == recipe_id))
+        if ingredients:
+            connection.execute(
+                table.insert(),
+                [
+                    {"recipe_id": recipe_id, "ingredient": ingredient}
+                    for ingredient in sorted(ingredients)
+                ],
+            )
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from sqlalchemy import or_
+
+from extensions import db
+
+
+class RevokedToken(db.Model):
+    __tablename__ = "revoked_token"
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime())
+    revoked_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
+
+    __table_args__ = (
+        db.Index("ix_revoked_token_revoked_at", "revoked_at"),
+        db.Index("ix_revoked_token_expires_at", "expires_at"),
+    )
+
+    @classmethod
+    def get_active(cls, revoked_since=None):
+        query = db.session.query(cls.jti, cls.expires_at, cls.revoked_at).filter(
+            or_(cls.expires_at.is_(None), cls.expires_at > datetime.utcnow())
+        )
+
+        if revoked_since is not None:
+            query = query.filter(cls.revoked_at >= revoked_since)
+
+        return query.all()
+
+    @classmethod
+    def delete_expired(cls):
+        count = cls.query.filter(cls.expires_at <= datetime.utcnow()).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+        return count
+
+    def save(self):
+        db.session.add(self)
+        db.session.commit()
@@ -0,0 +1,120 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+
+
+class StoredImage(db.Model):
+    """Reference count for one content-addressed image file."""
+
+    __tablename__ = "stored_image"
+
+    folder = db.Column(db.String(20), primary_key=True)
+    filename = db.Column(db.String(100), primary_key=True)
+    refcount = db.Column(db.Integer(), nullable=False, default=1)
+    created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
+    # Set once every rendition has been written.
+    rendered_at = db.Column(db.DateTime())
+
+    @classmethod
+    def acquire(cls, folder, filename):
+        """Take a reference and return True if it is the first one."""
+        statement = (
+            update(cls)
+            .where(cls.folder == folder, cls.filename == filename)
+            .values(refcount=cls.refcount + 1)
+        )
+        if db.session.execute(statement).rowcount:
+            db.session.commit()
+            return False
+
+        try:
+            db.session.add(cls(folder=folder, filename=filename, refcount=1))
+            db.session.commit()
+        except IntegrityError:
+            # Someone else inserted it first; count this as a second reference.
+            db.session.rollback()
+            return cls.acquire(folder, filename)
+
+        return True
+
+    @classmethod
+    def release(cls, folder, filename, on_last):
+        """Drop a reference. ``on_last`` removes the files when it was the last
+        one and runs before the commit, while the row is still locked, so a
+        concurrent ``acquire`` waits and then writes the file again."""
+        refcount = db.session.execute(
+            update(cls)
+            .where(cls.folder == folder, cls.filename == filename)
+            .values(refcount=cls.refcount - 1)
+            .returning(cls.refcount)
+        ).scalar()
+
+        # Uploads from before content addressing have no row.
+        if refcount is None or refcount <= 0:
+            if refcount is not None:
+                db.session.execute(
+                    db.delete(cls).where(
+                        cls.folder == folder,
+                        cls.filename == filename,
+                        cls.refcount <= 0,
+                    )
+                )
+            on_last()
+
+        db.session.commit()
+
+    @classmethod
+    def mark_rendered(cls, folder, filename):
+        db.session.execute(
+            update(cls)
+            .where(cls.folder == folder, cls.filename == filename)
+            .values(rendered_at=func.now())
+        )
+        db.session.commit()
+
+    @classmethod
+    def rendered(cls, folder, filenames):
+        """Return the subset of ``filenames`` with renditions, in one query."""
+        return set(
+            db.session.scalars(
+                select(cls.filename).where(
+                    cls.folder == folder,
+                    cls.filename.in_(filenames),
+                    cls.rendered_at.isnot(None),
+                )
+            )
+        )
+
+    @classmethod
+    def pending(cls):
+        return db.session.execute(
+            select(cls.folder, cls.filename)
+            .where(cls.rendered_at.is_(None))
+            .order_by(cls.created_at)
+        ).all()
+
+    @classmethod
+    def adopt(cls, folder, column):
+        """Add rows for files referenced by ``column`` from before content
+        addressing, so they are counted and rendered like new uploads."""
+        references = (
+            select(column, func.count())
+            .where(column.isnot(None))
+            .where(
+                ~select(cls.filename)
+                .where(cls.folder == folder, cls.filename == column)
+                .exists()
+            )
+            .group_by(column)
+        )
+
+        rows = [
+            {"folder": folder, "filename": filename, "refcount": count}
+            for filename, count in db.session.execute(references)
+        ]
+        if rows:
+            db.session.execute(db.insert(cls), rows)
+        db.session.commit()
+
+        return len(rows)
@@ -1,3 +1,5 @@
+from sqlalchemy import func, select, update
+
 from extensions import db
 
 
@@ -10,6 +12,14 @@ class User(db.Model):
     password = db.Column(db.String(200))
     is_active = db.Column(db.Boolean(), default=False)
     avatar_image = db.Column(db.String(100), default=None)
+    # Maintained by the Recipe mapper events and Recipe.bulk_insert; repair
+    # drift with ``flask reconcile-recipe-counts``.
+    published_recipe_count = db.Column(
+        db.Integer(), nullable=False, default=0, server_default="0"
+    )
+    draft_recipe_count = db.Column(
+        db.Integer(), nullable=False, default=0, server_default="0"
+    )
     created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
     updated_at = db.Column(
         db.DateTime(),
@@ -20,10 +30,81 @@ class User(db.Model):
 
     recipes = db.relationship("Recipe", backref="user")
 
+    @property
+    def recipe_count(self):
+        return self.published_recipe_count + self.draft_recipe_count
+
+    def count_recipes(self, visibility="public"):
+        if visibility == "public":
+            return self.published_recipe_count
+        if visibility == "private":
+            return self.draft_recipe_count
+
+        return self.recipe_count
+
+    @classmethod
+    def adjust_recipe_counts(cls, connection, user_id, published=0, draft=0):
+        """Add to a user's counters inside the caller's transaction."""
+        if user_id is None or not (published or draft):
+            return
+
+        connection.execute(
+            update(cls.__table__)
+            .where(cls.__table__.c.id == user_id)
+            .values(
+                published_recipe_count=cls.__table__.c.published_recipe_count
+                + published,
+                draft_recipe_count=cls.__table__.c.draft_recipe_count + draft,
+                # Counter upkeep is not a profile change; cached author
+                # snapshots carry updated_at.
+                updated_at=cls.__table__.c.updated_at,
+            )
+        )
+
+    @classmethod
+    def reconcile_recipe_counts(cls):
+        """Recount every user's recipes and return the ids that had drifted."""
+        from models.recipe import Recipe
+
+        def counted(condition):
+            return (
+                select(func.count(Recipe.id))
+                .where(Recipe.user_id == cls.id, condition)
+                .scalar_subquery()
+            )
+
+        published = counted(Recipe.is_publish.is_(True))
+        draft = counted(Recipe.is_publish.isnot(True))
+        drifted = db.session.scalars(
+            select(cls.id).where(
+                (cls.published_recipe_count != published)
+                | (cls.draft_recipe_count != draft)
+            )
+        ).all()
+
+        if drifted:
+            db.session.execute(
+                update(cls)
+                .where(cls.id.in_(drifted))
+                .values(
+                    published_recipe_count=published,
+                    draft_recipe_count=draft,
+                    updated_at=cls.updated_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+
+        return drifted
+
     @classmethod
     def get_by_username(cls, username):
         return cls.query.filter_by(username=username).first()
 
+    @classmethod
+    def get_by_usernames(cls, usernames):
+        return cls.query.filter(cls.username.in_(usernames)).all()
+
     @classmethod
     def get_by_email(cls, email):
         return cls.query.filter_by(email=email).first()
@@ -0,0 +1,211 @@
+import base64
+import json
+import math
+import operator
+from datetime import datetime
+
+from sqlalchemy import and_, asc, desc, or_, tuple_
+
+# Dialects that sort NULL after every other value in ascending order.
+NULLS_LARGEST = {"postgresql", "oracle"}
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort, value, id):
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+
+    payload = json.dumps([sort, value, id], separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def value_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return str
+
+
+def is_value_of(value, python_type):
+    # Cursors are client input; a value the column cannot hold must not
+    # reach the driver.
+    if value is None:
+        return True
+    if isinstance(value, bool):
+        return False
+    if python_type is datetime:
+        return isinstance(value, datetime)
+    if python_type is float:
+        return isinstance(value, (int, float))
+    if python_type is int:
+        return isinstance(value, int)
+
+    return isinstance(value, str)
+
+
+def decode_cursor(token, sort, python_type=str):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor_sort, value, id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+    except (ValueError, TypeError, KeyError):
+        raise CursorError("Invalid cursor")
+
+    if cursor_sort != sort or isinstance(id, bool) or not isinstance(id, int):
+        raise CursorError("Cursor does not match the requested sort")
+
+    if not is_value_of(value, python_type):
+        raise CursorError("Invalid cursor")
+
+    return value, id
+
+
+def nulls_key(value, dialect):
+    """Sort key placing None where ``dialect`` sorts NULL."""
+    if value is None:
+        return dialect in NULLS_LARGEST, None
+
+    return dialect not in NULLS_LARGEST, value
+
+
+def order_by(query, sort_column, id_column, order):
+    if order == "asc":
+        return query.order_by(asc(sort_column), asc(id_column))
+
+    return query.order_by(desc(sort_column), desc(id_column))
+
+
+def bind_value(value, dialect):
+    # SQLite stores server_default timestamps as text without microseconds,
+    # so compare against the same representation.
+    if dialect == "sqlite" and isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+
+    return value
+
+
+def seek_condition(sort_column, id_column, value, id, ascending, nullable, dialect):
+    compare = operator.gt if ascending else operator.lt
+    value = bind_value(value, dialect)
+
+    if sort_column is id_column:
+        return compare(id_column, id)
+
+    if not nullable:
+        return compare(tuple_(sort_column, id_column), tuple_(value, id))
+
+    # NULLs are either the first or the last group in this scan direction.
+    nulls_after = (dialect in NULLS_LARGEST) == ascending
+
+    if value is None:
+        condition = and_(sort_column.is_(None), compare(id_column, id))
+        return condition if nulls_after else or_(condition, sort_column.isnot(None))
+
+    condition = or_(
+        compare(sort_column, value),
+        and_(sort_column == value, compare(id_column, id)),
+    )
+    return or_(condition, sort_column.is_(None)) if nulls_after else condition
+
+
+def seek(query, sort_column, id_column, ascending, value, id):
+    dialect = query.session.get_bind().dialect.name
+    nullable = getattr(sort_column.expression, "nullable", True)
+
+    return query.filter(
+        seek_condition(sort_column, id_column, value, id, ascending, nullable, dialect)
+    )
+
+
+class Page:
+    """The parts of a Flask-SQLAlchemy ``Pagination`` the schemas read."""
+
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.pages = math.ceil(total / per_page) if total else 0
+        self.has_prev = page > 1
+        self.prev_num = page - 1 if self.has_prev else None
+        self.has_next = page < self.pages
+        self.next_num = page + 1 if self.has_next else None
+
+
+class CursorPagination:
+    def __init__(self, items, per_page, sort, sort_key, has_prev, has_next, total):
+        self.items = items
+        self.per_page = per_page
+        self.has_prev = has_prev
+        self.has_next = has_next
+
+        if total is not None:
+            self.total = total
+
+        self.prev_cursor = None
+        self.next_cursor = None
+        if items:
+            self.prev_cursor = encode_cursor(sort, *sort_key(items[0]))
+            self.next_cursor = encode_cursor(sort, *sort_key(items[-1]))
+
+
+def keyset_paginate(
+    query,
+    sort,
+    sort_column,
+    id_column,
+    order,
+    per_page,
+    after=None,
+    before=None,
+    with_total=False,
+    total=None,
+):
+    """Paginate ``query`` by seeking past the (sort key, id) pair encoded in
+    ``after`` or ``before`` instead of using OFFSET. A known ``total`` is used
+    instead of a count query."""
+    if with_total and total is None:
+        total = query.order_by(None).count()
+    elif not with_total:
+        total = None
+
+    ascending = order == "asc"
+
+    token = before or after or None
+    backwards = bool(before)
+    if backwards:
+        ascending = not ascending
+
+    if token is not None:
+        value, id = decode_cursor(token, sort, value_type(sort_column))
+        query = seek(query, sort_column, id_column, ascending, value, id)
+
+    query = order_by(query, sort_column, id_column, "asc" if ascending else "desc")
+    items = query.limit(per_page + 1).all()
+
+    has_more = len(items) > per_page
+    items = items[:per_page]
+
+    if backwards:
+        items.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = token is not None, has_more
+
+    def sort_key(item):
+        return getattr(item, sort_column.key), getattr(item, id_column.key)
+
+    return CursorPagination(
+        items=items,
+        per_page=per_page,
+        sort=sort,
+        sort_key=sort_key,
+        has_prev=has_prev,
+        has_next=has_next,
+        total=total,
+    )
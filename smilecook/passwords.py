@@ -0,0 +1,118 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from passlib.context import CryptContext
+
+# Schemes older hashes may still use; they verify, then get upgraded.
+LEGACY_SCHEMES = ["pbkdf2_sha256"]
+
+_contexts = {}
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+def build_context(scheme, rounds=None):
+    schemes = [scheme] + [name for name in LEGACY_SCHEMES if name != scheme]
+    settings = {}
+
+    if rounds:
+        # Hashes below the configured cost report needs_update and are rehashed.
+        settings[f"{scheme}__default_rounds"] = rounds
+        settings[f"{scheme}__min_rounds"] = rounds
+
+    return CryptContext(
+        schemes=schemes, default=scheme, deprecated=schemes[1:], **settings
+    )
+
+
+def verify_and_update(policy, password, hashed):
+    # Runs in pool workers too, so the context is rebuilt from its string
+    # form once per process.
+    context = _contexts.get(policy)
+    if context is None:
+        context = _contexts[policy] = CryptContext.from_string(policy)
+
+    return context.verify_and_update(password, hashed)
+
+
+def start_method():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return "forkserver"
+
+    return "spawn"
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.app = None
+        self.context = build_context("pbkdf2_sha256")
+        self.policy = self.context.to_string()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.context = build_context(
+            app.config["PASSWORD_SCHEME"], app.config["PASSWORD_ROUNDS"]
+        )
+        self.policy = self.context.to_string()
+
+        pool_size = app.config["PASSWORD_POOL_SIZE"]
+        if pool_size:
+            # Caps the verifications queued or running, not just the workers.
+            self._slots = threading.BoundedSemaphore(pool_size * 2)
+
+    def hash(self, password):
+        return self.context.hash(password)
+
+    def verify_and_update(self, password, hashed):
+        """Return ``(verified, new_hash)``; ``new_hash`` is set when the stored
+        hash uses an outdated scheme or cost."""
+        if self._slots is None:
+            return verify_and_update(self.policy, password, hashed)
+
+        timeout = self.app.config["PASSWORD_POOL_TIMEOUT"]
+
+        if not self._slots.acquire(timeout=timeout):
+            raise PasswordPoolBusy()
+
+        try:
+            future = self.pool.submit(verify_and_update, self.policy, password, hashed)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # A verification already running cannot be cancelled, so its slot is
+        # only given back once the worker is done with it.
+        future.add_done_callback(lambda future: self._slots.release())
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordPoolBusy()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # Forked workers would inherit the app's threads and
+                    # open connections mid-use.
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.app.config["PASSWORD_POOL_SIZE"],
+                        mp_context=multiprocessing.get_context(start_method()),
+                    )
+
+        return self._pool
+
+
+password_hasher = PasswordHasher()
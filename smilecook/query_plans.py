@@ -0,0 +1,137 @@
+"""EXPLAIN checks for the hot recipe list queries"""
+
+from datetime import datetime
+
+from models.recipe import Recipe
+from pagination import order_by, seek
+
+SORTS = ["created_at", "cook_time", "num_of_servings", "id"]
+VISIBILITIES = ["public", "private", "all"]
+
+# Narrow, wide and combined range filters.
+SAMPLE_RANGES = [
+    {"max_cook_time": 30},
+    {"min_servings": 2, "max_servings": 4},
+    {"min_cook_time": 10, "max_cook_time": 240, "max_servings": 6},
+]
+
+SAMPLE_CURSOR = {
+    "created_at": datetime(2024, 1, 1),
+    "cook_time": 30,
+    "num_of_servings": 4,
+    "id": 1000,
+}
+
+
+def query_shapes(per_page=20, user_id=1):
+    for sort in SORTS:
+        column = getattr(Recipe, sort)
+        for order in ("asc", "desc"):
+            query = Recipe.published_query()
+            yield f"published sort={sort} order={order}", order_by(
+                query, column, Recipe.id, order
+            ).limit(per_page)
+
+            query = seek(
+                query,
+                column,
+                Recipe.id,
+                order == "asc",
+                SAMPLE_CURSOR[sort],
+                SAMPLE_CURSOR["id"],
+            )
+            yield f"published sort={sort} order={order} after", order_by(
+                query, column, Recipe.id, order
+            ).limit(per_page)
+
+        for ranges in SAMPLE_RANGES:
+            query = Recipe.filter_ranges(
+                Recipe.published_query(), sort_column=column, **ranges
+            )
+            filters = " ".join(f"{name}={value}" for name, value in ranges.items())
+            yield f"published sort={sort} {filters}", order_by(
+                query, column, Recipe.id, "desc"
+            ).limit(per_page)
+
+    for visibility in VISIBILITIES:
+        query = Recipe.user_query(user_id=user_id, visibility=visibility)
+        yield f"user visibility={visibility}", order_by(
+            query, Recipe.created_at, Recipe.id, "desc"
+        ).limit(per_page)
+
+        query = seek(
+            query,
+            Recipe.created_at,
+            Recipe.id,
+            False,
+            SAMPLE_CURSOR["created_at"],
+            SAMPLE_CURSOR["id"],
+        )
+        yield f"user visibility={visibility} after", order_by(
+            query, Recipe.created_at, Recipe.id, "desc"
+        ).limit(per_page)
+
+
+def explain(query):
+    connection = query.session.connection()
+    compiled = query.statement.compile(dialect=connection.dialect)
+
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if connection.dialect.name == "postgresql":
+        # Only report a scan or sort when no index path exists at all.
+        for setting in ("enable_seqscan", "enable_bitmapscan", "enable_sort"):
+            connection.exec_driver_sql(f"SET LOCAL {setting} = off")
+
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", params
+        ).scalar()
+        return postgres_problems(plan[0]["Plan"])
+
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled}", params
+        ).all()
+        return sqlite_problems(row[3] for row in rows)
+
+    raise NotImplementedError(f"Cannot inspect plans on {connection.dialect.name}")
+
+
+def postgres_problems(plan):
+    problems = []
+
+    node = plan["Node Type"]
+    if node == "Seq Scan" and plan.get("Relation Name") == Recipe.__tablename__:
+        problems.append("sequential scan on recipe")
+    if node in ("Sort", "Incremental Sort"):
+        problems.append(f"{node.lower()} on {', '.join(plan.get('Sort Key', []))}")
+
+    for child in plan.get("Plans", []):
+        problems.extend(postgres_problems(child))
+
+    return problems
+
+
+def sqlite_problems(details):
+    problems = []
+
+    for detail in details:
+        table_scan = detail.startswith(("SCAN recipe", "SCAN TABLE recipe"))
+        if table_scan and "USING" not in detail:
+            problems.append(detail)
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+
+    return problems
+
+
+def check_query_plans(session):
+    results = []
+
+    for name, query in query_shapes():
+        results.append((name, explain(query)))
+        session.rollback()
+
+    return results
@@ -0,0 +1,212 @@
+"""SQLite storage for Flask-Limiter
+
+Registers the ``sqlite://`` scheme with ``limits`` so every process on a host
+can share one rate limit database, e.g.
+``RATELIMIT_STORAGE_URI=sqlite:////var/run/smilecook/ratelimit.db``. Writers
+take SQLite's file lock with ``BEGIN IMMEDIATE``, which makes each hit atomic
+across processes. Both the fixed and the moving window strategies work.
+
+Rows of keys that stopped hitting are deleted by the next write after
+``prune_interval`` seconds (a storage option), so the file does not grow with
+every client ever seen.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import MovingWindowSupport, Storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counter (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entry (
+    key TEXT NOT NULL,
+    acquired_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entry_key_acquired_at ON entry (key, acquired_at);
+CREATE INDEX IF NOT EXISTS ix_counter_expires_at ON counter (expires_at);
+CREATE INDEX IF NOT EXISTS ix_entry_acquired_at ON entry (acquired_at);
+"""
+
+
+class SQLiteStorage(Storage, MovingWindowSupport):
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri, timeout=5, prune_interval=60, **options):
+        # Same convention as SQLAlchemy: sqlite:///relative, sqlite:////absolute
+        self.path = uri.split("://", 1)[1][1:]
+        self.timeout = float(timeout)
+        self.prune_interval = float(prune_interval)
+        self._local = threading.local()
+        self._pruned_at = time.time()
+        # The longest moving window seen; older entries count for no key.
+        self._max_window = 0
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self.connection as connection:
+            connection.executescript(SCHEMA)
+
+        super().__init__(uri, **options)
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    def transaction(self):
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+
+        return connection
+
+    def prune(self, connection, now):
+        """Delete expired counters and entries, at most once per
+        ``prune_interval`` in this process."""
+        if now - self._pruned_at < self.prune_interval:
+            return
+
+        self._pruned_at = now
+        connection.execute("DELETE FROM counter WHERE expires_at <= ?", (now,))
+        if self._max_window:
+            connection.execute(
+                "DELETE FROM entry WHERE acquired_at <= ?", (now - self._max_window,)
+            )
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        connection = self.transaction()
+
+        try:
+            row = connection.execute(
+                "SELECT count, expires_at FROM counter WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                count, expires_at = amount, now + expiry
+            else:
+                count = row[0] + amount
+                expires_at = now + expiry if elastic_expiry else row[1]
+
+            connection.execute(
+                "INSERT OR REPLACE INTO counter (key, count, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, count, expires_at),
+            )
+            self.prune(connection, now)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return count
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT count FROM counter WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self.connection.execute(
+            "SELECT expires_at FROM counter WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+
+        return int(row[0] if row else now)
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+
+        now = time.time()
+        self._max_window = max(self._max_window, expiry)
+        connection = self.transaction()
+
+        try:
+            self.prune(connection, now)
+            # Entries outside the window are never read again.
+            connection.execute(
+                "DELETE FROM entry WHERE key = ? AND acquired_at <= ?",
+                (key, now - expiry),
+            )
+            (acquired,) = connection.execute(
+                "SELECT COUNT(*) FROM entry WHERE key = ?", (key,)
+            ).fetchone()
+
+            if acquired + amount > limit:
+                # Keep what was pruned.
+                connection.execute("COMMIT")
+                return False
+
+            connection.executemany(
+                "INSERT INTO entry (key, acquired_at) VALUES (?, ?)",
+                [(key, now)] * amount,
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        oldest, acquired = self.connection.execute(
+            "SELECT MIN(acquired_at), COUNT(*) FROM entry "
+            "WHERE key = ? AND acquired_at > ?",
+            (key, now - expiry),
+        ).fetchone()
+
+        return int(oldest if oldest is not None else now), acquired
+
+    def check(self):
+        try:
+            self.connection.execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+
+        return True
+
+    def reset(self):
+        connection = self.transaction()
+
+        try:
+            counters = connection.execute("DELETE FROM counter").rowcount
+            entries = connection.execute("DELETE FROM entry").rowcount
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return counters + entries
+
+    def clear(self, key):
+        connection = self.transaction()
+
+        try:
+            connection.execute("DELETE FROM counter WHERE key = ?", (key,))
+            connection.execute("DELETE FROM entry WHERE key = ?", (key,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
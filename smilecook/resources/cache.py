@@ -0,0 +1,19 @@
+from http import HTTPStatus
+from flask_restful import Resource
+
+from extensions import cache
+
+
+class CacheDebugResource(Resource):
+    def get(self):
+        backend = cache.cache
+        metrics = getattr(backend, "metrics", None)
+
+        data = {
+            "backend": type(backend).__name__,
+            "size": backend.size() if hasattr(backend, "size") else None,
+        }
+        if metrics is not None:
+            data.update(metrics.snapshot())
+
+        return data, HTTPStatus.OK
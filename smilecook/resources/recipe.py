@@ -1,28 +1,110 @@
-import os
-from flask import request
+import hashlib
+import json
+import logging
+from flask import current_app, request
 from flask_restful import Resource
+from flask_restful.representations.json import output_json
 from http import HTTPStatus
 from webargs import fields
 from webargs.flaskparser import use_kwargs
 
-from marshmallow import ValidationError
+from marshmallow import EXCLUDE, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from models.recipe import Recipe
 from models.user import User
-from utils import save_image, clear_cache
+from feed import latest_feed
+from images import InvalidImage
+from ingredients import parse_ingredients
+from pagination import CursorError
+from utils import (
+    save_image,
+    delete_image,
+    cache_key,
+    clear_cache,
+    clear_recipe_cache,
+    cache_generation,
+    recipe_cache_key,
+    recipe_namespace,
+    user_recipes_namespace,
+    RECIPES_NAMESPACE,
+)
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from schemas.recipe import RecipeSchema, RecipePaginationSchema
+from schemas.recipe import RecipeSchema, RecipeListSerializer
 
-from extensions import image_set, cache, limiter
+from extensions import db, image_set, cache, limiter
+
+logger = logging.getLogger(__name__)
 
 recipe_schema = RecipeSchema()
-recipe_list_schema = RecipeSchema(many=True)
-recipe_cover_schema = RecipeSchema(only=("cover_image_url",))
-recipe_pagination_schema = RecipePaginationSchema()
+recipe_cover_schema = RecipeSchema(only=("cover_image_url", "cover_image_renditions"))
+recipe_list_serializer = RecipeListSerializer()
+# Exported recipes re-import as drafts; their read-only fields are dropped.
+recipe_import_schema = RecipeSchema(unknown=EXCLUDE)
+
+
+def recipe_list_cache_key(*args, **kwargs):
+    return cache_key(RECIPES_NAMESPACE)
+
+
+def is_batch_lookup(*args, **kwargs):
+    return "ids" in request.args
+
+
+def recipe_list_cost():
+    # Pages served from the cache and batch lookups by primary key only count
+    # against the looser limit.
+    if is_batch_lookup() or cache.has(recipe_list_cache_key()):
+        return 0
+
+    return 1
+
+
+def recipe_entry(recipe):
+    body = output_json(recipe_schema.dump(recipe), HTTPStatus.OK).get_data()
+
+    return {
+        "body": body,
+        "etag": hashlib.sha1(body).hexdigest(),
+        "last_modified": recipe.updated_at,
+    }
+
+
+def access_failure(recipe_id, user_id, message="Access not allowed"):
+    """The 404 or 403 response if ``user_id`` may not edit the recipe."""
+    recipe = Recipe.get_by_id(recipe_id=recipe_id)
+    if recipe is None:
+        return {"message": "recipe not found"}, HTTPStatus.NOT_FOUND
+    if recipe.user_id != user_id:
+        return {"message": message}, HTTPStatus.FORBIDDEN
+
+    return None
+
+
+def update_failure(recipe_id, message="Access not allowed"):
+    # The UPDATE matched nothing: tell a missing recipe from someone else's.
+    if Recipe.get_by_id(recipe_id=recipe_id) is None:
+        return {"message": "recipe not found"}, HTTPStatus.NOT_FOUND
+
+    return {"message": message}, HTTPStatus.FORBIDDEN
+
+
+def recipe_response(entry):
+    response = current_app.response_class(entry["body"], mimetype="application/json")
+    response.set_etag(entry["etag"])
+    response.last_modified = entry["last_modified"]
+
+    return response.make_conditional(request)
 
 
 class RecipeListResource(Resource):
     decorators = [
-        limiter.limit("2/minute", methods=["GET"], error_message="Too Many Requests")
+        limiter.limit(
+            "2/minute",
+            methods=["GET"],
+            cost=recipe_list_cost,
+            error_message="Too Many Requests",
+        ),
+        limiter.limit("60/minute", methods=["GET"], error_message="Too Many Requests"),
     ]
 
     @use_kwargs(
@@ -32,23 +114,124 @@ class RecipeListResource(Resource):
             "per_page": fields.Int(missing=20),
             "sort": fields.Str(missing="created_at"),
             "order": fields.Str(missing="desc"),
+            "paginate": fields.Str(missing="offset"),
+            "after": fields.Str(missing=None),
+            "before": fields.Str(missing=None),
+            "total": fields.Bool(missing=False),
+            "min_cook_time": fields.Int(missing=None),
+            "max_cook_time": fields.Int(missing=None),
+            "min_servings": fields.Int(missing=None),
+            "max_servings": fields.Int(missing=None),
+            "ids": fields.DelimitedList(fields.Int(), missing=None),
         },
         location="query",
     )
-    @cache.cached(timeout=60, query_string=True)
-    def get(self, q, page, per_page, sort, order):
-        print("Querying Database...!")
-        if sort not in ["created_at", "cook_time", "num_of_servings", "id"]:
+    # The cache key hashes every query argument, filters included. Batch
+    # lookups depend on the caller and are never cached.
+    @cache.cached(
+        timeout=60, make_cache_key=recipe_list_cache_key, unless=is_batch_lookup
+    )
+    def get(
+        self,
+        q,
+        page,
+        per_page,
+        sort,
+        order,
+        paginate,
+        after,
+        before,
+        total,
+        ids,
+        **ranges,
+    ):
+        if ids is not None:
+            return self.get_batch(ids)
+
+        if sort not in [
+            "created_at",
+            "cook_time",
+            "num_of_servings",
+            "id",
+            "relevance",
+        ]:
             sort = "created_at"
 
         if order not in ["asc", "desc"]:
             order = "desc"
 
-        paginated_recipes = Recipe.get_all_published(
-            q=q, page=page, per_page=per_page, sort=sort, order=order
+        is_default_feed = (
+            not q
+            and sort == "created_at"
+            and order == "desc"
+            and paginate == "offset"
+            and not (after or before)
+            and all(value is None for value in ranges.values())
         )
+        if is_default_feed:
+            feed_page = latest_feed.page(page, min(Recipe.MAX_PER_PAGE, per_page))
+            if feed_page is not None:
+                return recipe_list_serializer.dump(feed_page), HTTPStatus.OK
+
+        try:
+            paginated_recipes = Recipe.get_all_published(
+                q=q,
+                page=page,
+                per_page=per_page,
+                sort=sort,
+                order=order,
+                keyset=bool(paginate == "cursor" or after or before),
+                after=after,
+                before=before,
+                with_total=total,
+                **ranges,
+            )
+        except CursorError as error:
+            return {"message": str(error)}, HTTPStatus.BAD_REQUEST
 
-        return recipe_pagination_schema.dump(paginated_recipes), HTTPStatus.OK
+        return recipe_list_serializer.dump(paginated_recipes), HTTPStatus.OK
+
+    @jwt_required(optional=True)
+    def get_batch(self, recipe_ids):
+        """``GET /recipes?ids=1,2,3``: the readable recipes in the order asked
+        for, and a per-id error for the rest."""
+        recipe_ids = list(dict.fromkeys(recipe_ids))
+        if not recipe_ids:
+            return {"message": "No ids given"}, HTTPStatus.BAD_REQUEST
+
+        if len(recipe_ids) > current_app.config["BATCH_LOOKUP_LIMIT"]:
+            return {"message": "Too many ids"}, HTTPStatus.BAD_REQUEST
+
+        current_user = get_jwt_identity()
+        recipes = {recipe.id: recipe for recipe in Recipe.get_by_ids(recipe_ids)}
+
+        found = []
+        errors = []
+        for recipe_id in recipe_ids:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                errors.append(
+                    {
+                        "id": recipe_id,
+                        "status": HTTPStatus.NOT_FOUND,
+                        "message": "recipe not found",
+                    }
+                )
+            elif recipe.is_publish == False and recipe.user_id != current_user:
+                errors.append(
+                    {
+                        "id": recipe_id,
+                        "status": HTTPStatus.FORBIDDEN,
+                        "message": "Access not allowed",
+                    }
+                )
+            else:
+                found.append(recipe)
+
+        return {
+            "data": recipe_list_serializer.dump_items(found),
+            "errors": errors,
+        }, HTTPStatus.OK
 
     @jwt_required()
     def post(self):
@@ -65,51 +248,98 @@ class RecipeListResource(Resource):
 
         recipe = Recipe(**data, user_id=current_user)
         recipe.save()
+        clear_cache(user_recipes_namespace(recipe.user.username))
 
         return recipe_schema.dump(recipe), HTTPStatus.CREATED
 
 
+class RecipeIngredientSearchResource(Resource):
+    decorators = [
+        limiter.limit("60/minute", methods=["GET"], error_message="Too Many Requests")
+    ]
+
+    @use_kwargs(
+        {"have": fields.Str(missing=""), "limit": fields.Int(missing=20)},
+        location="query",
+    )
+    def get(self, have, limit):
+        ingredients = parse_ingredients(have)
+        if not ingredients:
+            return {"message": "No ingredients given"}, HTTPStatus.BAD_REQUEST
+
+        matches = Recipe.find_by_ingredients(ingredients, limit=min(max(limit, 1), 100))
+
+        return {
+            "have": sorted(ingredients),
+            "data": [
+                {
+                    "id": recipe_id,
+                    "coverage": round(matched / total, 4),
+                    "matched": matched,
+                    "missing": total - matched,
+                }
+                for recipe_id, matched, total in matches
+            ],
+        }, HTTPStatus.OK
+
+
 class RecipeResource(Resource):
     @jwt_required(optional=True)
     def get(self, recipe_id):
+        # Only published recipes are cached, so a hit needs no owner check.
+        # Read the generation before the row: an edit or unpublish that
+        # commits in between bumps it, and the stale entry is never read.
+        generation = cache_generation(recipe_namespace(recipe_id))
+        entry = cache.get(recipe_cache_key(recipe_id, generation))
+        if entry is not None:
+            return recipe_response(entry)
+
         recipe = Recipe.get_by_id(recipe_id=recipe_id)
         if recipe:
             current_user = get_jwt_identity()
 
             if recipe.is_publish == False and recipe.user_id != current_user:
                 return {"message": "Access not allowed"}, HTTPStatus.FORBIDDEN
-            return recipe_schema.dump(recipe), HTTPStatus.OK
+
+            entry = recipe_entry(recipe)
+            if recipe.is_publish and generation == cache_generation(
+                recipe_namespace(recipe_id)
+            ):
+                cache.set(recipe_cache_key(recipe_id, generation), entry)
+
+            return recipe_response(entry)
 
         return {"message": "recipe not found"}, HTTPStatus.NOT_FOUND
 
     @jwt_required()
     def put(self, recipe_id):
-        recipe = Recipe.get_by_id(recipe_id=recipe_id)
-        if not recipe:
-            return {"message": "recipe not found"}, HTTPStatus.NOT_FOUND
         json_data = request.get_json()
-        current_user = get_jwt_identity()
 
         try:
             data = recipe_schema.load(data=json_data)
         except ValidationError as errors:
-            return {
-                "message": "Validation Errors",
-                "errors": errors.messages,
-            }, HTTPStatus.BAD_REQUEST
-
-        if current_user != recipe.user_id:
-            return {"message": "Access not allowed"}, HTTPStatus.FORBIDDEN
+            # A missing or foreign recipe is reported first. Only invalid
+            # input pays for the check; valid edits are checked by the UPDATE.
+            return access_failure(recipe_id, get_jwt_identity()) or (
+                {
+                    "message": "Validation Errors",
+                    "errors": errors.messages,
+                },
+                HTTPStatus.BAD_REQUEST,
+            )
 
-        recipe.name = data["name"]
-        recipe.description = data["description"]
-        recipe.num_of_servings = data["num_of_servings"]
-        recipe.cook_time = data["cook_time"]
-        recipe.directions = data["directions"]
-        recipe.ingredients = data["ingredients"]
+        recipe = Recipe.update_owned(
+            recipe_id=recipe_id,
+            user_id=get_jwt_identity(),
+            # Fields left out of the body keep what is stored.
+            values={
+                field: data[field] for field in Recipe.EDITABLE_FIELDS if field in data
+            },
+        )
+        if recipe is None:
+            return update_failure(recipe_id)
 
-        recipe.save()
-        clear_cache("/recipes")
+        clear_recipe_cache(recipe.user.username, recipe.id, published=recipe.is_publish)
 
         return recipe_schema.dump(recipe), HTTPStatus.OK
 
@@ -123,8 +353,15 @@ class RecipeResource(Resource):
             if current_user != recipe.user_id:
                 return {{"message": "Access not allowed"}}, HTTPStatus.FORBIDDEN
 
+            username = recipe.user.username
+            cover_image = recipe.cover_image
+            published = recipe.is_publish
             recipe.delete()
-            clear_cache("/recipes")
+
+            if cover_image:
+                delete_image(filename=cover_image, folder="recipes")
+
+            clear_recipe_cache(username, recipe_id, published=published)
 
             return {}, HTTPStatus.NO_CONTENT
 
@@ -137,32 +374,33 @@ class RecipeResource(Resource):
         try:
             data = recipe_schema.load(data=json_data, partial=("name",))
         except ValidationError as error:
-            return {
-                "message": "Validation Errors",
-                "errors": error.messages,
-            }, HTTPStatus.BAD_REQUEST
-
-        recipe = Recipe.get_by_id(recipe_id=recipe_id)
-        if recipe:
-            current_user = get_jwt_identity()
-            if current_user != recipe.user_id:
-                return {"message": "Access is not allowed"}, HTTPStatus.FORBIDDEN
-
-            recipe.name = data.get("name") or recipe.name
-            recipe.description = data.get("description") or recipe.description
-            recipe.num_of_servings = (
-                data.get("num_of_servings") or recipe.num_of_servings
+            # As in put.
+            return access_failure(
+                recipe_id, get_jwt_identity(), message="Access is not allowed"
+            ) or (
+                {
+                    "message": "Validation Errors",
+                    "errors": error.messages,
+                },
+                HTTPStatus.BAD_REQUEST,
             )
-            recipe.cook_time = data.get("cook_time") or recipe.cook_time
-            recipe.directions = data.get("directions") or recipe.directions
-            recipe.ingredients = data.get("ingredients") or recipe.ingredients
 
-            recipe.save()
-            clear_cache("/recipes")
+        # Empty values keep what is stored.
+        recipe = Recipe.update_owned(
+            recipe_id=recipe_id,
+            user_id=get_jwt_identity(),
+            values={
+                field: data[field]
+                for field in Recipe.EDITABLE_FIELDS
+                if data.get(field)
+            },
+        )
+        if recipe is None:
+            return update_failure(recipe_id, message="Access is not allowed")
 
-            return recipe_schema.dump(recipe), HTTPStatus.OK
+        clear_recipe_cache(recipe.user.username, recipe.id, published=recipe.is_publish)
 
-        return {"message": "recipe not found"}, HTTPStatus.NOT_FOUND
+        return recipe_schema.dump(recipe), HTTPStatus.OK
 
 
 class RecipePublishResource(Resource):
@@ -176,7 +414,7 @@ class RecipePublishResource(Resource):
 
             recipe.is_publish = True
             recipe.save()
-            clear_cache("/recipes")
+            clear_recipe_cache(recipe.user.username, recipe.id)
 
             return {}, HTTPStatus.NO_CONTENT
 
@@ -191,7 +429,8 @@ class RecipePublishResource(Resource):
                 return {{"message": "Access not allowed"}}, HTTPStatus.FORBIDDEN
 
             recipe.is_publish = False
-            clear_cache("/recipes")
+            recipe.save()
+            clear_recipe_cache(recipe.user.username, recipe.id)
 
             return {}, HTTPStatus.NO_CONTENT
 
@@ -211,18 +450,95 @@ class RecipeCoverUploadResource(Resource):
 
         recipe = Recipe.get_by_id(recipe_id=recipe_id)
         if recipe:
-            if recipe.cover_image:
-                cover_image_path = image_set.path(
-                    filename=recipe.cover_image, folder="recipes"
+            username = recipe.user.username
+            recipe_id = recipe.id
+            published = recipe.is_publish
+
+            try:
+                filename = save_image(
+                    image=file,
+                    folder="recipes",
+                    on_ready=lambda: clear_recipe_cache(
+                        username, recipe_id, published=published
+                    ),
                 )
-                if os.path.exists(cover_image_path):
-                    os.remove(cover_image_path)
+            except InvalidImage as error:
+                return {"message": str(error)}, HTTPStatus.BAD_REQUEST
 
-            file_path = save_image(image=file, folder="recipes")
-            recipe.cover_image = file_path
+            old_cover_image = recipe.cover_image
+            recipe.cover_image = filename
             recipe.save()
-            clear_cache("/recipes")
+
+            # Released only once nothing points at it; a shared file stays.
+            if old_cover_image:
+                delete_image(filename=old_cover_image, folder="recipes")
+
+            clear_recipe_cache(username, recipe_id, published=published)
 
             return recipe_cover_schema.dump(recipe), HTTPStatus.OK
 
         return {"message": "recipe does not exist"}, HTTPStatus.NOT_FOUND
+
+
+class RecipeBulkResource(Resource):
+    @jwt_required()
+    def post(self):
+        current_user = get_jwt_identity()
+        batch_size = current_app.config["BULK_IMPORT_BATCH_SIZE"]
+
+        created = 0
+        errors = []
+        batch = []
+        # Each batch commits on its own; lines up to this one are saved.
+        committed_through = 0
+
+        def save(batch, last_line):
+            nonlocal created, committed_through
+
+            created += len(Recipe.bulk_insert(batch))
+            committed_through = last_line
+
+        try:
+            for line_number, line in enumerate(request.stream, start=1):
+                if not line.strip():
+                    continue
+
+                try:
+                    data = recipe_import_schema.load(json.loads(line))
+                except ValueError:
+                    errors.append({"line": line_number, "errors": "Invalid JSON"})
+                    continue
+                except ValidationError as error:
+                    errors.append({"line": line_number, "errors": error.messages})
+                    continue
+
+                batch.append({**data, "user_id": current_user})
+                if len(batch) == batch_size:
+                    save(batch, line_number)
+                    batch = []
+
+            if batch:
+                save(batch, line_number)
+        except SQLAlchemyError:
+            logger.exception("Bulk import failed after line %d", committed_through)
+            db.session.rollback()
+            failure = {
+                "message": "Import stopped by a database error",
+                "committed_through": committed_through,
+            }
+        else:
+            failure = None
+
+        if created:
+            user = User.get_by_id(id=current_user)
+            clear_cache(user_recipes_namespace(user.username))
+
+        data = {"created": created, "errors": errors}
+
+        if failure:
+            return {**failure, **data}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+        if created or not errors:
+            return data, HTTPStatus.CREATED if created else HTTPStatus.OK
+
+        return data, HTTPStatus.BAD_REQUEST
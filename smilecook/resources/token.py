@@ -9,11 +9,10 @@ from flask_jwt_extended import (
     get_jwt,
 )
 
-from utils import check_password
+from passwords import PasswordPoolBusy
+from utils import verify_and_update_password
 from models.user import User
-
-
-blacklist = set()
+from revocation import revocation_store
 
 
 class TokenResource(Resource):
@@ -25,7 +24,16 @@ class TokenResource(Resource):
 
         user = User.get_by_email(email=email)
 
-        if not user or not check_password(password, user.password):
+        verified, new_hash = False, None
+        if user:
+            try:
+                verified, new_hash = verify_and_update_password(password, user.password)
+            except PasswordPoolBusy:
+                return {
+                    "message": "Too many login attempts, please try again later"
+                }, HTTPStatus.SERVICE_UNAVAILABLE
+
+        if not verified:
             return {
                 "message": "email or password is incorrect"
             }, HTTPStatus.UNAUTHORIZED
@@ -35,6 +43,10 @@ class TokenResource(Resource):
                 "message": "The user account is not activated yet"
             }, HTTPStatus.FORBIDDEN
 
+        if new_hash:
+            user.password = new_hash
+            user.save()
+
         access_token = create_access_token(identity=user.id, fresh=True)
         refresh_token = create_refresh_token(identity=user.id)
 
@@ -57,8 +69,8 @@ class RefreshResource(Resource):
 class RevokeResource(Resource):
     @jwt_required(optional=False)
     def post(self):
-        jti = get_jwt()["jti"]
+        jwt_payload = get_jwt()
 
-        blacklist.add(jti)
+        revocation_store.revoke(jwt_payload["jti"], exp=jwt_payload.get("exp"))
 
         return {"message": "Successfully logged out"}, HTTPStatus.OK
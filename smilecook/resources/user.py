@@ -1,5 +1,13 @@
-import os
-from flask import request, url_for, render_template
+import json
+
+from flask import (
+    Response,
+    current_app,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_restful import Resource
 from http import HTTPStatus
 from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -8,32 +16,80 @@ from webargs import fields
 from webargs.flaskparser import use_kwargs
 
 from marshmallow import ValidationError
-from utils import verify_token, generate_token, save_image, clear_cache
+from utils import (
+    verify_token,
+    generate_token,
+    save_image,
+    delete_image,
+    cache_key,
+    clear_cache,
+    clear_recipe_cache,
+    user_recipes_namespace,
+    attachment_options,
+)
 from models.user import User
 from models.recipe import Recipe
+from images import InvalidImage
+from pagination import CursorError
 
 from schemas.user import UserSchema
-from schemas.recipe import RecipeSchema, RecipePaginationSchema
+from schemas.recipe import RecipeListSerializer
 
-from mailgun import MailgunApi
-from config import Config
+from mail_queue import mail_queue
 
-from extensions import image_set, limiter
+from extensions import db, image_set, cache, limiter
 
 user_schema = UserSchema()
 user_public_schema = UserSchema(exclude=("email",))
-user_avatar_schema = UserSchema(only=("avatar_url",))
+user_avatar_schema = UserSchema(only=("avatar_url", "avatar_renditions"))
 
-recipe_list_schema = RecipeSchema(many=True)
-recipe_pagination_schema = RecipePaginationSchema()
+recipe_list_serializer = RecipeListSerializer()
 
-mailgun = MailgunApi(
-    domain=Config.MAILGUN_DOMAIN,
-    api_key=Config.MAILGUN_API_KEY,
-)
+
+def user_recipe_list_cache_key(*args, **kwargs):
+    return cache_key(
+        user_recipes_namespace(kwargs["username"]), identity=get_jwt_identity()
+    )
 
 
 class UserListResource(Resource):
+    @jwt_required(optional=True)
+    @use_kwargs(
+        {"usernames": fields.DelimitedList(fields.Str(), missing=None)},
+        location="query",
+    )
+    def get(self, usernames):
+        """``GET /users?usernames=a,b``: the users in the order asked for, and
+        a per-username error for the rest."""
+        usernames = list(dict.fromkeys(usernames or ()))
+        if not usernames:
+            return {"message": "No usernames given"}, HTTPStatus.BAD_REQUEST
+
+        if len(usernames) > current_app.config["BATCH_LOOKUP_LIMIT"]:
+            return {"message": "Too many usernames"}, HTTPStatus.BAD_REQUEST
+
+        current_user = get_jwt_identity()
+        users = {user.username: user for user in User.get_by_usernames(usernames)}
+
+        data = []
+        errors = []
+        for username in usernames:
+            user = users.get(username)
+            if user is None:
+                errors.append(
+                    {
+                        "username": username,
+                        "status": HTTPStatus.NOT_FOUND,
+                        "message": "user not found",
+                    }
+                )
+            elif current_user == user.id:
+                data.append(user_schema.dump(user))
+            else:
+                data.append(user_public_schema.dump(user))
+
+        return {"data": data, "errors": errors}, HTTPStatus.OK
+
     def post(self):
         json_data = request.get_json()
 
@@ -45,6 +101,9 @@ class UserListResource(Resource):
                 "errors": errors.messages,
             }, HTTPStatus.BAD_REQUEST
 
+        # A replica may not have the account someone just signed up with yet.
+        db.session().use_primary = True
+
         if User.get_by_username(data.get("username")):
             return {"message": "username already used"}, HTTPStatus.BAD_REQUEST
 
@@ -53,6 +112,7 @@ class UserListResource(Resource):
 
         user = User(**data)
         user.save()
+        clear_cache(user_recipes_namespace(user.username))
 
         token = generate_token(user.email, salt="activate")
         subject = "Please Confirm Your Registration."
@@ -60,7 +120,7 @@ class UserListResource(Resource):
         link = url_for("useractivateresource", token=token, _external=True)
         text = f"Hi, Thanks for using SmileCook! Please confirm your registration by clicking on the link: {link}"
 
-        mailgun.send_email(
+        mail_queue.enqueue(
             to=user.email,
             subject=subject,
             text=text,
@@ -112,10 +172,15 @@ class UserRecipeListResource(Resource):
             "visibility": fields.Str(missing="public", required=False),
             "page": fields.Int(missing=1),
             "per_page": fields.Int(missing=10),
+            "paginate": fields.Str(missing="offset"),
+            "after": fields.Str(missing=None),
+            "before": fields.Str(missing=None),
+            "total": fields.Bool(missing=False),
         },
         location="query",
     )
-    def get(self, username, visibility, page, per_page):
+    @cache.cached(timeout=60, make_cache_key=user_recipe_list_cache_key)
+    def get(self, username, visibility, page, per_page, paginate, after, before, total):
         user = User.get_by_username(username=username)
         if user:
             current_user = get_jwt_identity()
@@ -123,18 +188,82 @@ class UserRecipeListResource(Resource):
                 visibility = "public"
 
             per_page = max(15, per_page)
-            recipes = Recipe.get_all_by_user(
-                user_id=user.id,
-                page=page,
-                per_page=per_page,
-                visibility=visibility,
-            )
-
-            return recipe_pagination_schema.dump(recipes), HTTPStatus.OK
+            try:
+                recipes = Recipe.get_all_by_user(
+                    user_id=user.id,
+                    page=page,
+                    per_page=per_page,
+                    visibility=visibility,
+                    keyset=bool(paginate == "cursor" or after or before),
+                    after=after,
+                    before=before,
+                    with_total=total,
+                    total=user.count_recipes(visibility),
+                )
+            except CursorError as error:
+                return {"message": str(error)}, HTTPStatus.BAD_REQUEST
+
+            return recipe_list_serializer.dump(recipes), HTTPStatus.OK
 
         return {"message": "User Not Found"}, HTTPStatus.NOT_FOUND
 
 
+class UserStatsResource(Resource):
+    @jwt_required(optional=True)
+    def get(self, username):
+        user = User.get_by_username(username=username)
+        if not user:
+            return {"message": "User Not Found"}, HTTPStatus.NOT_FOUND
+
+        data = {
+            "username": user.username,
+            "published_recipes": user.published_recipe_count,
+        }
+
+        # Drafts are private to their owner.
+        if get_jwt_identity() == user.id:
+            data["draft_recipes"] = user.draft_recipe_count
+            data["total_recipes"] = user.recipe_count
+
+        return data, HTTPStatus.OK
+
+
+class UserRecipeExportResource(Resource):
+    @jwt_required(optional=True)
+    @use_kwargs({"visibility": fields.Str(missing="public")}, location="query")
+    def get(self, username, visibility):
+        user = User.get_by_username(username=username)
+        if not user:
+            return {"message": "User Not Found"}, HTTPStatus.NOT_FOUND
+
+        if get_jwt_identity() != user.id or visibility not in ["all", "private"]:
+            visibility = "public"
+
+        batches = Recipe.export(
+            user_id=user.id,
+            visibility=visibility,
+            batch_size=current_app.config["EXPORT_BATCH_SIZE"],
+        )
+
+        def generate():
+            for recipes in batches:
+                yield "".join(
+                    json.dumps(recipe) + "\n"
+                    for recipe in recipe_list_serializer.dump_items(recipes)
+                )
+
+        response = Response(
+            stream_with_context(generate()), mimetype="application/x-ndjson"
+        )
+        response.headers.set(
+            "Content-Disposition",
+            "attachment",
+            **attachment_options(f"{user.username}-recipes.ndjson"),
+        )
+
+        return response
+
+
 class UserActivateResource(Resource):
     def get(self, token):
         email = verify_token(token=token, salt="activate")
@@ -169,15 +298,25 @@ class UserAvatarUploadResource(Resource):
 
         user = User.get_by_id(id=get_jwt_identity())
 
-        if user.avatar_image:
-            avatar_path = image_set.path(folder="avatars", filename=user.avatar_image)
+        username = user.username
+        recipe_ids = [recipe.id for recipe in user.recipes]
 
-            if os.path.exists(avatar_path):
-                os.remove(avatar_path)
+        try:
+            filename = save_image(
+                image=file,
+                folder="avatars",
+                on_ready=lambda: clear_recipe_cache(username, *recipe_ids),
+            )
+        except InvalidImage as error:
+            return {"message": str(error)}, HTTPStatus.BAD_REQUEST
 
-        filename = save_image(image=file, folder="avatars")
+        old_avatar_image = user.avatar_image
         user.avatar_image = filename
         user.save()
-        clear_cache("/recipes")
+
+        if old_avatar_image:
+            delete_image(filename=old_avatar_image, folder="avatars")
+
+        clear_recipe_cache(username, *recipe_ids)
 
         return user_avatar_schema.dump(user), HTTPStatus.OK
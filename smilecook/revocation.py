@@ -0,0 +1,103 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models.revoked_token import RevokedToken
+
+
+class RevocationStore:
+    """Revoked JWTs persisted in the ``revoked_token`` table.
+
+    Each process mirrors the unexpired entries in a dict, so the per-request
+    check is a dict lookup. The mirror is refreshed incrementally at most every
+    ``REVOCATION_SYNC_INTERVAL`` seconds; revocations made by this process are
+    visible immediately, those made elsewhere after the next sync.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._watermark = None
+        self._synced_at = None
+        self._pruned_at = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+
+    def is_revoked(self, jti):
+        self.sync()
+
+        return jti in self._revoked
+
+    def revoke(self, jti, exp=None):
+        expires_at = datetime.utcfromtimestamp(exp) if exp else None
+
+        try:
+            RevokedToken(jti=jti, expires_at=expires_at).save()
+        except IntegrityError:
+            db.session.rollback()
+
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+        self.delete_expired()
+
+    def sync(self, force=False):
+        interval = self.app.config["REVOCATION_SYNC_INTERVAL"]
+        now = time.monotonic()
+
+        if not force and self._synced_at and now - self._synced_at < interval:
+            return
+
+        # Only the first load has to block; later syncs are skipped if
+        # another thread is already running one.
+        if not self._lock.acquire(blocking=force or self._synced_at is None):
+            return
+
+        try:
+            revoked_since = None
+            if self._watermark is not None:
+                # Overlap the previous sync so rows committed late by another
+                # process are not missed.
+                revoked_since = self._watermark - timedelta(
+                    seconds=self.app.config["REVOCATION_SYNC_OVERLAP"]
+                )
+
+            rows = RevokedToken.get_active(revoked_since=revoked_since)
+
+            utcnow = datetime.utcnow()
+            revoked = {
+                jti: expires_at
+                for jti, expires_at in self._revoked.items()
+                if expires_at is None or expires_at > utcnow
+            }
+            for jti, expires_at, revoked_at in rows:
+                revoked[jti] = expires_at
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+
+            self._revoked = revoked
+            self._synced_at = now
+        finally:
+            self._lock.release()
+
+    def delete_expired(self, force=False):
+        interval = self.app.config["REVOCATION_PRUNE_INTERVAL"]
+        now = time.monotonic()
+
+        if not force and self._pruned_at and now - self._pruned_at < interval:
+            return 0
+
+        self._pruned_at = now
+
+        return RevokedToken.delete_expired()
+
+
+revocation_store = RevocationStore()
@@ -0,0 +1,97 @@
+import time
+
+from flask import request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+REPLICA_BIND = "replica"
+
+# Set on responses to requests that wrote; while it is fresh, the client's
+# reads go to the primary too.
+PRIMARY_COOKIE = "read_primary_until"
+
+
+class RoutingSession(Session):
+    """Send plain SELECTs to the ``replica`` bind when one is configured.
+
+    Writes, ``SELECT ... FOR UPDATE`` and every statement after this session
+    has written go to the primary, so a request reads its own writes. Callers
+    that must not read stale rows set ``use_primary`` themselves.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_primary = False
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self.use_primary and is_read(clause):
+            replica = self._db.engines.get(REPLICA_BIND)
+
+            if replica is not None:
+                return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def close(self):
+        super().close()
+        self.use_primary = False
+        self.wrote = False
+
+
+def is_read(clause):
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def stick_to_primary(session):
+    session.use_primary = True
+    session.wrote = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def stick_after_flush(session, flush_context):
+    stick_to_primary(session)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def stick_after_write(orm_execute_state):
+    # Core UPDATE/INSERT/DELETE through session.execute() never flush.
+    if not orm_execute_state.is_select:
+        stick_to_primary(orm_execute_state.session)
+
+
+def init_app(app):
+    """Carry read-your-writes over to the client's next requests for
+    ``DATABASE_REPLICA_READ_DELAY`` seconds, about the replica's lag."""
+    delay = app.config["DATABASE_REPLICA_READ_DELAY"]
+    if not delay:
+        return
+
+    db = app.extensions["sqlalchemy"]
+
+    def has_replica():
+        return db.engines.get(REPLICA_BIND) is not None
+
+    @app.before_request
+    def read_from_primary():
+        try:
+            until = float(request.cookies.get(PRIMARY_COOKIE, 0))
+        except ValueError:
+            return
+
+        if until > time.time() and has_replica():
+            db.session().use_primary = True
+
+    @app.after_request
+    def remember_write(response):
+        if db.session.registry.has() and db.session().wrote and has_replica():
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                str(time.time() + delay),
+                max_age=max(int(delay), 1),
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
@@ -0,0 +1,9 @@
+from marshmallow import Schema
+
+from instrumentation import timed
+
+
+class BaseSchema(Schema):
+    def dump(self, obj, *, many=None):
+        with timed("ser"):
+            return super().dump(obj, many=many)
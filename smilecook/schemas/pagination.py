@@ -1,9 +1,12 @@
 from flask import request
-from marshmallow import Schema, fields
+from marshmallow import fields
 from urllib.parse import urlencode
 
+from pagination import CursorPagination
+from schemas.base import BaseSchema
 
-class PaginationSchema(Schema):
+
+class PaginationSchema(BaseSchema):
     class Meta:
         ordered = True
 
@@ -22,7 +25,20 @@ class PaginationSchema(Schema):
 
         return f"{request.base_url}?{urlencode(query_args)}"
 
+    @staticmethod
+    def get_cursor_url(**cursor):
+        query_args = request.args.to_dict()
+        for key in ("page", "after", "before"):
+            query_args.pop(key, None)
+        query_args["paginate"] = "cursor"
+        query_args.update(cursor)
+
+        return f"{request.base_url}?{urlencode(query_args)}"
+
     def get_pagination_links(self, paginated_objects):
+        if isinstance(paginated_objects, CursorPagination):
+            return self.get_cursor_links(paginated_objects)
+
         paginated_links = {
             "first": self.get_url(page=1),
             "last": self.get_url(page=paginated_objects.pages),
@@ -35,3 +51,18 @@ class PaginationSchema(Schema):
             paginated_links["next"] = self.get_url(page=paginated_objects.next_num)
 
         return paginated_links
+
+    def get_cursor_links(self, paginated_objects):
+        paginated_links = {"first": self.get_cursor_url()}
+
+        if paginated_objects.has_prev and paginated_objects.prev_cursor:
+            paginated_links["prev"] = self.get_cursor_url(
+                before=paginated_objects.prev_cursor
+            )
+
+        if paginated_objects.has_next and paginated_objects.next_cursor:
+            paginated_links["next"] = self.get_cursor_url(
+                after=paginated_objects.next_cursor
+            )
+
+        return paginated_links
@@ -1,9 +1,12 @@
 from flask import url_for
-from marshmallow import Schema, fields
+from marshmallow import fields
+from schemas.base import BaseSchema
+from images import image_pipeline
+from storage import image_storage
 from utils import hash_password
 
 
-class UserSchema(Schema):
+class UserSchema(BaseSchema):
     class Meta:
         ordered = True
 
@@ -13,6 +16,7 @@ class UserSchema(Schema):
     password = fields.Method(required=True, deserialize="load_password")
 
     avatar_url = fields.Method(serialize="dump_avatar_url")
+    avatar_renditions = fields.Method(serialize="dump_avatar_renditions")
 
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
@@ -22,9 +26,18 @@ class UserSchema(Schema):
 
     def dump_avatar_url(self, user):
         if user.avatar_image:
-            return url_for(
-                "static", filename=f"images/avatar/{user.avatar_image}", _external=True
-            )
+            renditions = self.dump_avatar_renditions(user)
+            if renditions:
+                return renditions["full"]
+
+            return image_storage.folder_url("avatars") + user.avatar_image
         return url_for(
             "static", filename="images/assets/default-avatar.jpg", _external=True
         )
+
+    def dump_avatar_renditions(self, user):
+        return image_pipeline.rendition_urls(
+            image_storage.folder_url("avatars"),
+            "avatars",
+            user.avatar_image,
+        )
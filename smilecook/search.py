@@ -0,0 +1,175 @@
+"""Full-text search for recipes
+
+PostgreSQL keeps a weighted ``search_vector`` column on ``recipe`` up to date
+through a trigger (see migration ``b7e2d4f1a9c3``). Other databases, SQLite in
+particular, fall back to an in-process inverted index with the same weights.
+Each process applies its own commits to it and picks up the others' through
+``index_sync``. The index also keeps what a listing filters and sorts on, so
+the matches are ranked and paged in Python and only one page is loaded.
+"""
+
+import re
+import threading
+from collections import defaultdict, namedtuple
+
+from sqlalchemy import func, literal_column
+
+SEARCH_CONFIG = "english"
+
+# Same defaults as ts_rank: A=1.0, B=0.4, C=0.2
+FIELD_WEIGHTS = {
+    "name": 1.0,
+    "description": 0.4,
+    "ingredients": 0.2,
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+Document = namedtuple(
+    "Document",
+    [
+        "name",
+        "description",
+        "ingredients",
+        "is_publish",
+        "created_at",
+        "cook_time",
+        "num_of_servings",
+    ],
+)
+Listing = namedtuple(
+    "Listing", ["id", "is_publish", "created_at", "cook_time", "num_of_servings"]
+)
+
+
+def stem(token):
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("oes"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [stem(token) for token in TOKEN_RE.findall(text.lower())]
+
+
+def snapshot(recipe):
+    return Document(*(getattr(recipe, field) for field in Document._fields))
+
+
+def uses_full_text(session):
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def ts_query(q):
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+
+def ts_match(q):
+    return literal_column("recipe.search_vector").op("@@")(ts_query(q))
+
+
+def ts_rank(q):
+    return func.ts_rank_cd(literal_column("recipe.search_vector"), ts_query(q))
+
+
+class InvertedIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._listings = {}
+        self._built = False
+
+    @property
+    def built(self):
+        return self._built
+
+    def build(self, rows):
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            self._listings = {}
+            for row in rows:
+                self._add(row.id, row)
+            self._built = True
+
+    def add(self, recipe_id, document):
+        with self._lock:
+            self._remove(recipe_id)
+            self._add(recipe_id, document)
+
+    def remove(self, recipe_id):
+        with self._lock:
+            self._remove(recipe_id)
+
+    def search(self, q):
+        terms = set(tokenize(q))
+        if not terms:
+            return {}
+
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms]
+            postings.sort(key=len)
+
+            scores = dict(postings[0])
+            for posting in postings[1:]:
+                scores = {
+                    recipe_id: score + posting[recipe_id]
+                    for recipe_id, score in scores.items()
+                    if recipe_id in posting
+                }
+
+        return scores
+
+    def matches(self, q):
+        """Return ``(listing, score)`` for the published recipes matching
+        every term of ``q``."""
+        scores = self.search(q)
+
+        with self._lock:
+            listings = [
+                (self._listings.get(recipe_id), score)
+                for recipe_id, score in scores.items()
+            ]
+
+        return [
+            (listing, score)
+            for listing, score in listings
+            if listing is not None and listing.is_publish
+        ]
+
+    def _add(self, recipe_id, document):
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(document, field)):
+                weights[token] += weight
+
+        for token, weight in weights.items():
+            self._postings[token][recipe_id] = weight
+        self._documents[recipe_id] = set(weights)
+        self._listings[recipe_id] = Listing(
+            recipe_id,
+            document.is_publish,
+            document.created_at,
+            document.cook_time,
+            document.num_of_servings,
+        )
+
+    def _remove(self, recipe_id):
+        self._listings.pop(recipe_id, None)
+        for token in self._documents.pop(recipe_id, ()):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(recipe_id, None)
+            if not posting:
+                del self._postings[token]
+
+
+search_index = InvertedIndex()
@@ -0,0 +1,91 @@
+"""Pluggable storage for uploaded images
+
+``IMAGE_STORAGE`` names the backend class. The default, ``storage.LocalStorage``,
+keeps files under ``UPLOADED_IMAGES_DEST`` and serves them from the static
+route. Files are content-addressed and never change once written, so they are
+served with a year-long ``immutable`` Cache-Control. Any other backend needs
+the same methods: ``save``, ``open``, ``exists``, ``delete`` and ``folder_url``.
+"""
+
+import os
+import uuid
+
+from flask import request, url_for
+from werkzeug.utils import import_string
+
+from extensions import image_set
+
+IMAGE_FOLDERS = ("recipes", "avatars")
+
+
+class LocalStorage:
+    def __init__(self, app):
+        self.max_age = app.config["IMAGE_CACHE_MAX_AGE"]
+        self.prefixes = tuple(f"images/{folder}/" for folder in IMAGE_FOLDERS)
+
+        app.after_request(self.add_cache_headers)
+
+    def path(self, folder, name):
+        return image_set.path(filename=name, folder=folder)
+
+    def save(self, folder, name, stream, chunk_size=64 * 1024):
+        path = self.path(folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Concurrent writers of the same name each use their own temp file.
+        part = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(part, "wb") as file:
+                while chunk := stream.read(chunk_size):
+                    file.write(chunk)
+            os.replace(part, path)
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+
+    def open(self, folder, name):
+        return open(self.path(folder, name), "rb")
+
+    def exists(self, folder, name):
+        return os.path.exists(self.path(folder, name))
+
+    def delete(self, folder, name):
+        try:
+            os.remove(self.path(folder, name))
+        except FileNotFoundError:
+            pass
+
+    def folder_url(self, folder):
+        return url_for("static", filename=f"images/{folder}/", _external=True)
+
+    def add_cache_headers(self, response):
+        if request.endpoint != "static" or response.status_code not in (200, 304):
+            return response
+
+        if request.view_args.get("filename", "").startswith(self.prefixes):
+            response.cache_control.public = True
+            response.cache_control.max_age = self.max_age
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+
+        return response
+
+
+class ImageStorage:
+    def __init__(self, app=None):
+        self.backend = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = import_string(app.config["IMAGE_STORAGE"])(app)
+
+    def __getattr__(self, name):
+        if self.backend is None:
+            raise AttributeError(name)
+
+        return getattr(self.backend, name)
+
+
+image_storage = ImageStorage()
@@ -1,22 +1,45 @@
-from passlib.hash import pbkdf2_sha256
-
 from itsdangerous import URLSafeTimedSerializer
-from flask import current_app
+from flask import current_app, request
 
+import hashlib
+import unicodedata
 import uuid
-from flask_uploads import extension
-from extensions import image_set, cache
-
-import os
-from PIL import Image
+from urllib.parse import quote
+from extensions import cache
+from images import content_hash, image_pipeline, inspect_upload
+from models.stored_image import StoredImage
+from passwords import password_hasher
+from storage import image_storage
 
 
 def hash_password(password):
-    return pbkdf2_sha256.hash(password)
+    return password_hasher.hash(password)
 
 
 def check_password(password, hashed):
-    return pbkdf2_sha256.verify(password, hashed)
+    verified, _ = password_hasher.verify_and_update(password, hashed)
+
+    return verified
+
+
+def verify_and_update_password(password, hashed):
+    return password_hasher.verify_and_update(password, hashed)
+
+
+def attachment_options(filename):
+    """``Content-Disposition`` options for ``filename``, quoted by the caller's
+    ``Headers.set``. Other names than printable ASCII get an ASCII fallback
+    plus the RFC 5987 ``filename*`` form, as ``send_file`` does."""
+    if filename.isascii() and filename.isprintable():
+        return {"filename": filename}
+
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore")
+    return {
+        "filename": "".join(
+            char for char in fallback.decode("ascii") if char.isprintable()
+        ),
+        "filename*": f"UTF-8''{quote(filename, safe='')}",
+    }
 
 
 def generate_token(email, salt=None):
@@ -37,44 +60,83 @@ def verify_token(token, max_age=(30 * 60), salt=None):
     return email
 
 
-def save_image(image, folder):
-    filename = f"{uuid.uuid4()}.{extension(image.filename)}"
+def save_image(image, folder, on_ready=None):
+    config = current_app.config
+    chunk_size = config["UPLOAD_CHUNK_SIZE"]
+    extension = inspect_upload(image.stream, max_pixels=config["IMAGE_MAX_PIXELS"])
+    filename = f"{content_hash(image.stream, chunk_size)}.{extension}"
 
-    image_set.save(image, folder=folder, name=filename)
-    filename = compress_image(filename=filename, folder=folder)
+    # A duplicate upload shares the stored file and its renditions.
+    created = StoredImage.acquire(folder, filename)
+    if created or not image_storage.exists(folder, filename):
+        image_storage.save(folder, filename, image.stream, chunk_size=chunk_size)
+
+    # Rendering is idempotent, so a duplicate of a pending upload renders too
+    # and gets its own on_ready callback.
+    if created or not image_pipeline.is_ready(folder, filename):
+        image_pipeline.submit(folder, filename, on_ready=on_ready)
 
     return filename
 
 
-def compress_image(filename, folder):
-    file_path = image_set.path(filename=filename, folder=folder)
-    image = Image.open(file_path)
+def delete_image(filename, folder):
+    StoredImage.release(
+        folder, filename, on_last=lambda: image_pipeline.delete(folder, filename)
+    )
+
+
+RECIPES_NAMESPACE = "recipes"
+
+
+def user_recipes_namespace(username):
+    return f"user-recipes/{username}"
+
 
-    if image.mode != "RGB":
-        image = image.convert("RGB")
+def cache_generation(namespace):
+    key = f"generation:{namespace}"
+    generation = cache.get(key)
 
-    if max(image.width, image.height) > 1600:
-        maxsize = (1600, 1600)
-        image.resize(maxsize, Image.ANTIALIAS)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=0)
+        generation = cache.get(key)
 
-    compressed_filename = f"{uuid.uuid4()}.jpg"
-    compressed_file_path = image_set.path(filename=compressed_filename, folder=folder)
+    return generation
 
-    image.save(compressed_file_path, optimize=True, quality=85)
 
-    original_size = os.stat(file_path).st_size
-    compressed_size = os.stat(compressed_file_path).st_size
-    percentage = round((original_size - compressed_size) / original_size * 100)
+def cache_key(namespace, identity=None):
+    args = tuple(sorted(request.args.items(multi=True)))
+    digest = hashlib.md5(str(args).encode()).hexdigest()
 
-    print(
-        f"The file size is reduced {percentage} from {original_size} to {compressed_size}."
+    return (
+        f"{namespace}:{cache_generation(namespace)}:{identity}:{request.path}:{digest}"
     )
 
-    os.remove(file_path)
-    return compressed_filename
+
+def clear_cache(namespace):
+    # Entries keyed under the old generation are never read again and
+    # simply expire, so this works the same on every cache backend.
+    cache.set(f"generation:{namespace}", uuid.uuid4().hex, timeout=0)
+
+
+def recipe_namespace(recipe_id):
+    return f"recipe/{recipe_id}"
+
+
+def recipe_cache_key(recipe_id, generation):
+    return f"recipe:{recipe_id}:{generation}"
 
 
-def clear_cache(key_prefix):
-    keys = [key for key in cache.cache._cache.keys() if key.startswith(key_prefix)]
+def clear_recipe_cache(username, *recipe_ids, published=True):
+    # Only published recipes are listed under /recipes.
+    if published:
+        clear_cache(RECIPES_NAMESPACE)
+    clear_cache(user_recipes_namespace(username))
 
-    cache.delete_many(*keys)
+    if recipe_ids:
+        cache.set_many(
+            {
+                f"generation:{recipe_namespace(recipe_id)}": uuid.uuid4().hex
+                for recipe_id in recipe_ids
+            },
+            timeout=0,
+        )
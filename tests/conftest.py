@@ -0,0 +1,123 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+SMILECOOK = os.path.join(os.path.dirname(os.path.dirname(__file__)), "smilecook")
+TMP = tempfile.mkdtemp(prefix="smilecook-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP}/db.sqlite"
+os.environ["CACHE_DIR"] = f"{TMP}/cache"
+os.environ["RATELIMIT_STORAGE_URI"] = "memory://"
+os.environ["FEED_LOCK_FILE"] = f"{TMP}/feed.lock"
+os.environ["SECRET_KEY"] = "test-secret-key-with-enough-length"
+
+sys.path.insert(0, SMILECOOK)
+
+import config  # noqa: E402
+
+config.Config.DEBUG = False
+config.Config.TESTING = True
+config.Config.JWT_SECRET_KEY = os.environ["SECRET_KEY"]
+config.Config.RATELIMIT_ENABLED = False
+config.Config.MAIL_QUEUE_WORKER = False
+config.Config.UPLOADED_IMAGES_DEST = f"{TMP}/images"
+config.Config.PASSWORD_ROUNDS = 1000
+
+from flask import g  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from extensions import cache, db  # noqa: E402
+from models.recipe import Recipe, ingredient_sync, search_sync  # noqa: E402
+from models.user import User  # noqa: E402
+from revocation import revocation_store  # noqa: E402
+from utils import hash_password  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        cache.clear()
+        # The in-process indexes outlive each test's database.
+        ingredient_sync.invalidate()
+        search_sync.invalidate()
+
+        yield flask_app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "SQL_QUERY_COUNT_HEADER", True)
+    # A revocation sync falling due mid-test would add a query.
+    monkeypatch.setitem(app.config, "REVOCATION_SYNC_INTERVAL", float("inf"))
+    revocation_store.sync(force=True)
+
+    def count_queries(url, method="get", status=200, **kwargs):
+        # Requests share the test's app context, so start from an empty
+        # session and counter as a real request would.
+        db.session.remove()
+        g.pop("sql_query_count", None)
+        response = getattr(client, method)(url, **kwargs)
+        assert response.status_code == status, response.json
+
+        return int(response.headers["X-SQL-Query-Count"]), response
+
+    return count_queries
+
+
+@pytest.fixture
+def make_user(app):
+    def make_user(username):
+        user = User(
+            username=username,
+            email=f"{username}@example.com",
+            password=hash_password("password"),
+            is_active=True,
+        )
+        user.save()
+
+        return user
+
+    return make_user
+
+
+@pytest.fixture
+def auth_headers(app):
+    def auth_headers(user):
+        token = create_access_token(identity=user.id, fresh=True)
+
+        return {"Authorization": f"Bearer {token}"}
+
+    return auth_headers
+
+
+@pytest.fixture
+def make_recipe(app):
+    def make_recipe(user, is_publish=True, **fields):
+        recipe = Recipe(
+            name=fields.pop("name", "Tomato soup"),
+            description=fields.pop("description", "Warm and simple"),
+            num_of_servings=fields.pop("num_of_servings", 2),
+            cook_time=fields.pop("cook_time", 30),
+            directions=fields.pop("directions", "Simmer"),
+            ingredients=fields.pop("ingredients", "tomato, salt"),
+            is_publish=is_publish,
+            user_id=user.id,
+            **fields,
+        )
+        recipe.save()
+
+        return recipe
+
+    return make_recipe
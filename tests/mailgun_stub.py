@@ -0,0 +1,55 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class MailgunStubServer:
+    """Local stand-in for the Mailgun messages endpoint.
+
+    Pass ``stub.api_url`` as ``MAILGUN_API_URL``; every message posted to it is
+    recorded in ``stub.messages``. Set ``stub.status`` to simulate failures.
+    """
+
+    def __init__(self, status=200):
+        self.status = status
+        self.messages = []
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+
+                if stub.status < 400:
+                    stub.messages.append(form)
+
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"message": "Queued. Thank you."}')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def api_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/v3/{{}}/messages"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from extensions import db
+from models.recipe import Recipe
+
+
+def recipe_line(name, **fields):
+    return json.dumps(
+        {
+            "name": name,
+            "description": "Warm and simple",
+            "num_of_servings": 2,
+            "cook_time": 30,
+            "directions": "Simmer",
+            "ingredients": "tomato, salt",
+            **fields,
+        }
+    )
+
+
+@pytest.fixture
+def batches(app, monkeypatch):
+    """Import two recipes per batch and record each batch's names."""
+    monkeypatch.setitem(app.config, "BULK_IMPORT_BATCH_SIZE", 2)
+    bulk_insert = Recipe.bulk_insert
+    batches = []
+
+    def record_bulk_insert(rows):
+        batches.append([row["name"] for row in rows])
+
+        return bulk_insert(rows)
+
+    monkeypatch.setattr(Recipe, "bulk_insert", record_bulk_insert)
+
+    return batches
+
+
+@pytest.fixture
+def bulk_import(client, make_user, auth_headers):
+    headers = auth_headers(make_user("alice"))
+
+    def bulk_import(*lines):
+        db.session.remove()
+
+        return client.post(
+            "/recipes/bulk",
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+            headers=headers,
+        )
+
+    return bulk_import
+
+
+def imported():
+    db.session.remove()
+
+    return [
+        (recipe.name, recipe.is_publish) for recipe in Recipe.query.order_by(Recipe.id)
+    ]
+
+
+def test_import_reports_bad_lines_and_batches_the_rest(bulk_import, batches):
+    response = bulk_import(
+        recipe_line("Soup 1"),
+        "{not json",
+        recipe_line("Soup 2", is_publish=True),
+        "",
+        recipe_line("", num_of_servings=0),
+        recipe_line("Soup 3"),
+        recipe_line("Soup 4"),
+        recipe_line("Soup 5"),
+    )
+
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data["created"] == 5
+    assert [error["line"] for error in data["errors"]] == [2, 5]
+    assert data["errors"][0]["errors"] == "Invalid JSON"
+    assert "num_of_servings" in data["errors"][1]["errors"]
+
+    assert batches == [["Soup 1", "Soup 2"], ["Soup 3", "Soup 4"], ["Soup 5"]]
+    # Imports are drafts, whatever the line says.
+    assert imported() == [(f"Soup {n}", False) for n in range(1, 6)]
+
+
+def test_only_errors_is_a_bad_request(bulk_import, batches):
+    response = bulk_import("{not json")
+
+    assert response.status_code == 400
+    assert response.get_json() == {
+        "created": 0,
+        "errors": [{"line": 1, "errors": "Invalid JSON"}],
+    }
+    assert batches == []
+
+
+def test_database_failure_reports_the_committed_lines(
+    bulk_import, batches, monkeypatch
+):
+    bulk_insert = Recipe.bulk_insert
+
+    def fail_second_batch(rows):
+        if len(batches) == 1:
+            raise OperationalError("INSERT", {}, Exception("disk I/O error"))
+
+        return bulk_insert(rows)
+
+    monkeypatch.setattr(Recipe, "bulk_insert", fail_second_batch)
+
+    response = bulk_import(
+        recipe_line("Soup 1"),
+        "",
+        recipe_line("Soup 2"),
+        recipe_line("Soup 3"),
+        recipe_line("Soup 4"),
+    )
+
+    assert response.status_code == 500
+    data = response.get_json()
+    assert (data["created"], data["committed_through"]) == (2, 3)
+    assert imported() == [("Soup 1", False), ("Soup 2", False)]
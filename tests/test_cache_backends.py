@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from cache_backends import FileSystemCache, SimpleCache
+
+
+@pytest.fixture(params=["filesystem", "simple"])
+def backend(request, tmp_path):
+    if request.param == "filesystem":
+        return FileSystemCache(str(tmp_path), threshold=4)
+
+    return SimpleCache(threshold=4)
+
+
+def test_evictions_are_counted_per_prefix(backend):
+    for n in range(3):
+        backend.set(f"recipe:{n}", n, timeout=1)
+        backend.set(f"user/{n}", n)
+
+    evictions = backend.metrics.snapshot()
+    assert evictions["evictions"] > 0
+    assert (
+        sum(counts["evictions"] for counts in evictions["prefixes"].values())
+        == evictions["evictions"]
+    )
+    assert set(evictions["prefixes"]) == {"recipe", "user"}
+
+
+def test_expired_items_are_evicted_first(backend, monkeypatch):
+    for n in range(3):
+        backend.set(f"recipe:{n}", n, timeout=1)
+    for n in range(2):
+        backend.set(f"user/{n}", n, timeout=1000)
+
+    # Past every recipe's timeout, not the users'.
+    later = time.time() + 100
+    monkeypatch.setattr("cachelib.file.time", lambda: later)
+    monkeypatch.setattr("cachelib.simple.time", lambda: later)
+    backend.set("user/2", 2, timeout=1000)
+
+    prefixes = backend.metrics.snapshot()["prefixes"]
+    assert prefixes["recipe"]["evictions"] == 3
+    assert prefixes["user"]["evictions"] == 0
@@ -0,0 +1,36 @@
+import json
+from urllib.parse import quote
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "username, disposition",
+    [
+        ("alice", "attachment; filename=alice-recipes.ndjson"),
+        ('al "ice";x', 'attachment; filename="al \\"ice\\";x-recipes.ndjson"'),
+        (
+            "José",
+            "attachment; filename=Jose-recipes.ndjson; "
+            "filename*=UTF-8''Jos%C3%A9-recipes.ndjson",
+        ),
+        (
+            "al\r\nice",
+            "attachment; filename=alice-recipes.ndjson; "
+            "filename*=UTF-8''al%0D%0Aice-recipes.ndjson",
+        ),
+    ],
+)
+def test_export_filename_is_quoted(
+    client, make_user, make_recipe, username, disposition
+):
+    user = make_user(username)
+    recipe = make_recipe(user)
+
+    response = client.get(f"/users/{quote(username)}/recipes/export")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"] == disposition
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [
+        recipe.id
+    ]
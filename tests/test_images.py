@@ -0,0 +1,123 @@
+import io
+
+import pytest
+from PIL import Image
+
+from extensions import db
+from images import image_pipeline
+from models.stored_image import StoredImage
+from storage import image_storage
+
+
+def image_file(size=(64, 48), format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "tomato").save(buffer, format=format)
+    buffer.seek(0)
+
+    return buffer
+
+
+@pytest.fixture
+def deferred(monkeypatch):
+    """Hold rendering jobs until the test runs them."""
+    jobs = []
+    monkeypatch.setattr(
+        image_pipeline,
+        "submit",
+        lambda folder, filename, on_ready=None: jobs.append(
+            (folder, filename, on_ready)
+        ),
+    )
+
+    return jobs
+
+
+def upload_cover(client, recipe, headers):
+    return client.put(
+        f"/recipes/{recipe.id}/cover",
+        data={"cover_image": (image_file(), "cover.png")},
+        headers=headers,
+        content_type="multipart/form-data",
+    )
+
+
+def test_cover_url_is_the_full_rendition_once_ready(
+    client, make_user, make_recipe, auth_headers, deferred
+):
+    user = make_user("alice")
+    recipe = make_recipe(user)
+
+    response = upload_cover(client, recipe, auth_headers(user))
+    assert response.status_code == 200
+    [(folder, filename, on_ready)] = deferred
+
+    # Pending: the original is all there is.
+    assert response.json["cover_image_url"].endswith(f"/images/recipes/{filename}")
+    assert response.json["cover_image_renditions"] is None
+    assert client.get(f"/recipes/{recipe.id}").json["cover_image_renditions"] is None
+
+    image_pipeline._process(folder, filename, on_ready)
+
+    stored = db.session.get(StoredImage, (folder, filename))
+    db.session.refresh(stored)
+    assert stored.rendered_at is not None
+
+    full = filename.replace(".png", "_full.jpg")
+    single = client.get(f"/recipes/{recipe.id}").json
+    listed = client.get("/recipes").json["data"][0]
+    for data in (single, listed):
+        assert data["cover_image_url"].endswith(f"/images/recipes/{full}")
+        assert data["cover_image_renditions"]["full"] == data["cover_image_url"]
+
+
+def test_readiness_comes_from_the_database(
+    client, make_user, make_recipe, auth_headers, deferred, monkeypatch
+):
+    user = make_user("alice")
+    for _ in range(3):
+        upload_cover(client, make_recipe(user), auth_headers(user))
+    for folder, filename, on_ready in deferred:
+        image_pipeline._process(folder, filename, on_ready)
+
+    # A fresh process knows nothing and must not stat every row.
+    monkeypatch.setattr(image_pipeline, "_ready", type(image_pipeline._ready)())
+
+    def no_stat(*args):
+        raise AssertionError("readiness checked on the filesystem")
+
+    monkeypatch.setattr(image_storage.backend, "exists", no_stat)
+
+    data = client.get("/recipes").json["data"]
+    assert len(data) == 3
+    assert all(recipe["cover_image_url"].endswith("_full.jpg") for recipe in data)
+
+
+def test_render_images_adopts_and_renders_legacy_uploads(
+    app, client, make_user, make_recipe
+):
+    user = make_user("alice")
+    recipe = make_recipe(user)
+    image_storage.save("recipes", "legacy.jpg", image_file(format="JPEG"))
+    recipe.cover_image = "legacy.jpg"
+    recipe.save()
+
+    data = client.get("/recipes").json["data"][0]
+    assert data["cover_image_url"].endswith("/images/recipes/legacy.jpg")
+    assert data["cover_image_renditions"] is None
+
+    result = app.test_cli_runner().invoke(args=["render-images"])
+    assert result.exit_code == 0, result.output
+    assert "Adopted 1 image(s)" in result.output
+
+    stored = db.session.get(StoredImage, ("recipes", "legacy.jpg"))
+    assert stored.refcount == 1
+    assert stored.rendered_at is not None
+    assert image_storage.exists("recipes", "legacy_full.jpg")
+
+    # Nothing left to do on a second run.
+    result = app.test_cli_runner().invoke(args=["render-images"])
+    assert result.exit_code == 0
+    assert "ok" not in result.output
+
+    data = client.get(f"/recipes/{recipe.id}").json
+    assert data["cover_image_url"].endswith("/images/recipes/legacy_full.jpg")
@@ -0,0 +1,113 @@
+import pytest
+
+from extensions import db
+from utils import RECIPES_NAMESPACE, clear_cache
+from ingredients import ingredient_index
+from models.recipe import Recipe
+from models.recipe_change import RecipeChange
+from models.recipe_ingredient import RecipeIngredient
+from search import search_index
+
+
+@pytest.fixture
+def builds(app, monkeypatch):
+    """Sync on every request and count full rebuilds."""
+    monkeypatch.setitem(app.config, "RECIPE_INDEX_SYNC_INTERVAL", 0)
+
+    builds = []
+    for index in (ingredient_index, search_index):
+
+        def build(rows, build=index.build, index=index):
+            builds.append(index)
+            build(rows)
+
+        monkeypatch.setattr(index, "build", build)
+
+    return builds
+
+
+def by_ingredients(client, have):
+    response = client.get("/recipes/by-ingredients", query_string={"have": have})
+    assert response.status_code == 200
+
+    return [match["id"] for match in response.get_json()["data"]]
+
+
+def elsewhere(*statements):
+    """Commit the way another process would: none of this process's session
+    events fire."""
+    with db.engine.begin() as connection:
+        for statement in statements:
+            connection.execute(statement)
+
+
+def test_other_process_writes_are_applied_without_rebuild(
+    client, builds, make_user, make_recipe
+):
+    alice = make_user("alice")
+    soup = make_recipe(alice, ingredients="tomato, salt")
+
+    assert by_ingredients(client, "tomato") == [soup.id]
+    assert builds == [ingredient_index]
+
+    recipe = Recipe.__table__
+    ingredient = RecipeIngredient.__table__
+    change = RecipeChange.__table__
+    elsewhere(
+        recipe.insert().values(id=100, name="Salad", user_id=alice.id, is_publish=True),
+        ingredient.insert().values(recipe_id=100, ingredient="tomato"),
+        change.insert().values(recipe_id=100),
+    )
+
+    assert sorted(by_ingredients(client, "tomato")) == [soup.id, 100]
+
+    elsewhere(
+        ingredient.delete().where(ingredient.c.recipe_id == soup.id),
+        recipe.delete().where(recipe.c.id == soup.id),
+        change.insert().values(recipe_id=soup.id),
+    )
+
+    assert by_ingredients(client, "tomato") == [100]
+    assert builds == [ingredient_index]
+
+
+def search(client, q):
+    response = client.get("/recipes", query_string={"q": q})
+    assert response.status_code == 200
+
+    return [recipe["id"] for recipe in response.get_json()["data"]]
+
+
+def test_other_process_writes_are_searchable_without_rebuild(
+    client, builds, make_user, make_recipe
+):
+    alice = make_user("alice")
+    soup = make_recipe(alice, name="Tomato soup", ingredients="salt")
+
+    assert search(client, "tomato") == [soup.id]
+
+    recipe = Recipe.__table__
+    change = RecipeChange.__table__
+    elsewhere(
+        recipe.update().where(recipe.c.id == soup.id).values(name="Pea soup"),
+        change.insert().values(recipe_id=soup.id),
+    )
+    clear_cache(RECIPES_NAMESPACE)
+
+    assert search(client, "tomato") == []
+    assert search(client, "pea") == [soup.id]
+    assert builds == [search_index]
+
+
+def test_own_writes_are_logged(app, make_user, make_recipe):
+    alice = make_user("alice")
+    soup = make_recipe(alice)
+
+    soup.name = "Tomato bisque"
+    soup.save()
+    soup.delete()
+
+    recipe_ids, _ = RecipeChange.changed_since(db.session)
+
+    assert recipe_ids == {soup.id}
+    assert db.session.query(RecipeChange).count() == 3
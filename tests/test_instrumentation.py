@@ -0,0 +1,26 @@
+from flask import Flask
+
+import instrumentation
+
+
+def test_metrics_are_off_by_default(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_token():
+    app = Flask(__name__)
+    app.config.update(METRICS_ENDPOINT=True, METRICS_TOKEN="scraper-secret")
+    instrumentation.init_app(app)
+    client = app.test_client()
+
+    assert client.get("/metrics").status_code == 401
+    assert (
+        client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code
+        == 401
+    )
+
+    response = client.get(
+        "/metrics", headers={"Authorization": "Bearer scraper-secret"}
+    )
+    assert response.status_code == 200
+    assert response.content_type == instrumentation.PROMETHEUS_CONTENT_TYPE
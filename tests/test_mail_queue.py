@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from mail_queue import mail_queue
+from mailgun import MailgunApi
+from mailgun_stub import MailgunStubServer
+from models.mail import MailJob
+
+
+@pytest.fixture
+def mailgun(app, monkeypatch):
+    with MailgunStubServer() as stub:
+        monkeypatch.setattr(
+            mail_queue, "mailgun", MailgunApi("example.com", "key", stub.api_url)
+        )
+
+        yield stub
+
+
+def test_drain_sends_each_job_once(mailgun):
+    for n in range(3):
+        mail_queue.enqueue(f"user{n}@example.com", "Hello", "Hi there")
+
+    assert mail_queue.drain_all() == 3
+    assert mail_queue.drain_all() == 0
+    assert len(mailgun.messages) == 3
+    assert {job.status for job in MailJob.query} == {"sent"}
+
+
+def claim():
+    return [job.id for job in MailJob.claim_due(limit=10, lease=60, max_attempts=3)]
+
+
+def expire_claim(job_id):
+    """What a worker that died without reporting back leaves behind."""
+    db.session.get(MailJob, job_id).next_attempt_at = datetime.utcnow() - timedelta(
+        seconds=1
+    )
+    db.session.commit()
+
+
+def test_claimed_jobs_are_not_claimed_again(app):
+    job = mail_queue.enqueue("alice@example.com", "Hello", "Hi there")
+
+    assert claim() == [job.id]
+    # What a second worker gets while the first one is still sending.
+    assert claim() == []
+
+
+def test_expired_claims_are_retried_as_attempts(app):
+    job_id = mail_queue.enqueue("alice@example.com", "Hello", "Hi there").id
+    claim()
+
+    for attempts in (1, 2):
+        expire_claim(job_id)
+        assert claim() == [job_id]
+        assert db.session.get(MailJob, job_id).attempts == attempts
+
+    expire_claim(job_id)
+    assert claim() == []
+    job = db.session.get(MailJob, job_id)
+    assert (job.status, job.attempts) == ("failed", 3)
+
+
+def test_drain_commits_each_job(mailgun, monkeypatch):
+    for n in range(2):
+        mail_queue.enqueue(f"user{n}@example.com", "Hello", "Hi there")
+    send_email = mail_queue.mailgun.send_email
+
+    def crash_on_second(**kwargs):
+        if mailgun.messages:
+            raise RuntimeError("worker killed")
+
+        return send_email(**kwargs)
+
+    monkeypatch.setattr(mail_queue.mailgun, "send_email", crash_on_second)
+
+    with pytest.raises(RuntimeError):
+        mail_queue.drain()
+    db.session.rollback()
+
+    assert [job.status for job in MailJob.query.order_by(MailJob.id)] == [
+        "sent",
+        "sending",
+    ]
+
+
+def test_failures_go_back_to_pending(mailgun):
+    mailgun.status = 503
+    job = mail_queue.enqueue("alice@example.com", "Hello", "Hi there")
+
+    mail_queue.drain()
+
+    job = db.session.get(MailJob, job.id)
+    assert (job.status, job.attempts) == ("pending", 1)
+    assert job.next_attempt_at > datetime.utcnow()
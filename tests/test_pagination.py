@@ -0,0 +1,86 @@
+import base64
+import json
+
+import pytest
+
+from pagination import encode_cursor
+
+
+def forge(payload):
+    raw = json.dumps(payload).encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "sort, cursor",
+    [
+        ("created_at", forge(["created_at", [1, 2], 1])),
+        ("created_at", forge(["created_at", {"x": 1}, 1])),
+        ("created_at", forge(["created_at", {"dt": 5}, 1])),
+        ("created_at", forge(["created_at", "yesterday", 1])),
+        ("created_at", forge(["created_at", 12, 1])),
+        ("cook_time", forge(["cook_time", "ten", 1])),
+        ("cook_time", forge(["cook_time", {"a": "b"}, 1])),
+        ("cook_time", forge(["cook_time", True, 1])),
+        ("id", forge(["id", 1, "1"])),
+        ("id", forge(["id", 1, [1]])),
+        ("id", forge({"sort": "id"})),
+        ("id", "not base64 at all!"),
+    ],
+)
+def test_tampered_cursor_is_a_bad_request(client, make_user, make_recipe, sort, cursor):
+    make_recipe(make_user("alice"))
+
+    response = client.get(
+        "/recipes", query_string={"sort": sort, "paginate": "cursor", "after": cursor}
+    )
+
+    assert response.status_code == 400
+    assert "cursor" in response.json["message"].lower()
+
+
+def test_tampered_cursor_on_user_recipes(client, make_user, make_recipe):
+    make_recipe(make_user("alice"))
+
+    response = client.get(
+        "/users/alice/recipes",
+        query_string={"after": forge(["created_at", [1], 1])},
+    )
+
+    assert response.status_code == 400
+
+
+def test_issued_cursors_still_work(client, make_user, make_recipe):
+    user = make_user("alice")
+    for cook_time in (10, 20, 30, 40):
+        make_recipe(user, cook_time=cook_time)
+
+    first = client.get(
+        "/recipes",
+        query_string={
+            "sort": "cook_time",
+            "order": "asc",
+            "per_page": 2,
+            "paginate": "cursor",
+        },
+    )
+    assert [recipe["cook_time"] for recipe in first.json["data"]] == [10, 20]
+
+    second = client.get(first.json["links"]["next"])
+    assert second.status_code == 200
+    assert [recipe["cook_time"] for recipe in second.json["data"]] == [30, 40]
+
+
+def test_null_value_cursor_is_accepted(client, make_user, make_recipe):
+    make_recipe(make_user("alice"), cook_time=None)
+
+    response = client.get(
+        "/recipes",
+        query_string={
+            "sort": "cook_time",
+            "after": encode_cursor("cook_time", None, 1),
+        },
+    )
+
+    assert response.status_code == 200
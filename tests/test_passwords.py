@@ -0,0 +1,69 @@
+import pytest
+
+from extensions import db
+from models.user import User
+from passwords import PasswordHasher, PasswordPoolBusy, build_context
+
+
+@pytest.fixture
+def pooled(app, monkeypatch):
+    monkeypatch.setitem(app.config, "PASSWORD_POOL_SIZE", 1)
+    monkeypatch.setitem(app.config, "PASSWORD_POOL_TIMEOUT", 10)
+    hasher = PasswordHasher(app)
+
+    yield hasher
+
+    if hasher._pool is not None:
+        hasher._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def slow_hash(rounds=3_000_000):
+    """A hash that takes about a second to check, without taking as long to
+    make."""
+    hashed = build_context("pbkdf2_sha256", 1000).hash("password")
+
+    return hashed.replace("$1000$", f"${rounds}$")
+
+
+def test_pool_verifies_in_worker_processes(pooled):
+    hashed = pooled.hash("password")
+
+    assert pooled.verify_and_update("password", hashed) == (True, None)
+    assert pooled.verify_and_update("wrong", hashed) == (False, None)
+    assert pooled.pool._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_slot_is_held_until_a_timed_out_verification_finishes(app, pooled, monkeypatch):
+    # Start the worker first so only the verification counts.
+    pooled.verify_and_update("password", pooled.hash("password"))
+    monkeypatch.setitem(app.config, "PASSWORD_POOL_TIMEOUT", 0.05)
+
+    with pytest.raises(PasswordPoolBusy):
+        pooled.verify_and_update("password", slow_hash())
+
+    assert pooled._slots._value == 1
+
+    pooled.pool.shutdown(wait=True)
+    assert pooled._slots._value == 2
+
+
+def test_login_rehashes_an_outdated_hash(client, make_user):
+    user = make_user("alice")
+    user.password = build_context("pbkdf2_sha256", 500).hash("password")
+    user.save()
+    old_hash = user.password
+
+    def log_in():
+        db.session.remove()
+
+        return client.post(
+            "/token", json={"email": "alice@example.com", "password": "password"}
+        )
+
+    assert log_in().status_code == 200
+    new_hash = User.get_by_username("alice").password
+    assert new_hash != old_hash
+    assert "$1000$" in new_hash
+
+    assert log_in().status_code == 200
+    assert User.get_by_username("alice").password == new_hash
@@ -0,0 +1,61 @@
+import pytest
+
+
+def seed(make_user, make_recipe, authors, per_author):
+    users = [make_user(f"cook{number}") for number in range(authors)]
+    for user in users:
+        for number in range(per_author):
+            make_recipe(user, name=f"{user.username} dish {number}")
+            make_recipe(user, name=f"{user.username} draft {number}", is_publish=False)
+
+    return users
+
+
+@pytest.mark.parametrize("authors, per_author", [(1, 2), (6, 4)])
+def test_recipe_list_queries_do_not_grow_with_the_page(
+    count_queries, make_user, make_recipe, authors, per_author
+):
+    seed(make_user, make_recipe, authors, per_author)
+
+    # Count, page, authors.
+    count, response = count_queries("/recipes?sort=cook_time&per_page=30")
+    assert len(response.json["data"]) == authors * per_author
+    assert count == 3
+
+    # Cursor pages skip the count.
+    count, _ = count_queries("/recipes?sort=cook_time&per_page=30&paginate=cursor")
+    assert count == 2
+
+    # Default feed pages come from the materialized feed once built.
+    count_queries("/recipes")
+    count, response = count_queries("/recipes?per_page=5")
+    assert len(response.json["data"]) == min(5, authors * per_author)
+    assert count == 0
+
+
+@pytest.mark.parametrize("per_author", [1, 8])
+def test_user_recipe_list_queries_do_not_grow_with_the_page(
+    count_queries, make_user, make_recipe, auth_headers, per_author
+):
+    [user] = seed(make_user, make_recipe, 1, per_author)
+
+    # User, page, author; the total comes from the user's counters.
+    count, response = count_queries(f"/users/{user.username}/recipes?total=1")
+    assert len(response.json["data"]) == per_author
+    assert count == 3
+
+    count, response = count_queries(
+        f"/users/{user.username}/recipes?visibility=all",
+        headers=auth_headers(user),
+    )
+    assert len(response.json["data"]) == min(15, 2 * per_author)
+    assert count == 3
+
+
+def test_batch_lookup_is_one_query(count_queries, make_user, make_recipe):
+    users = seed(make_user, make_recipe, 3, 2)
+    ids = ",".join(str(recipe.id) for user in users for recipe in user.recipes)
+
+    count, response = count_queries(f"/recipes?ids={ids}")
+    assert len(response.json["data"]) == 6
+    assert count == 1
@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter, MovingWindowRateLimiter
+
+import ratelimit_storage
+from extensions import rate_limit_key
+from ratelimit_storage import SQLiteStorage
+
+LIMIT = parse("2/minute")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit_storage, "time", clock)
+
+    return clock
+
+
+@pytest.fixture
+def storage(tmp_path, clock):
+    return SQLiteStorage(f"sqlite:///{tmp_path}/ratelimit.db", prune_interval=0)
+
+
+def rows(storage, table):
+    with sqlite3.connect(storage.path) as connection:
+        return [key for (key,) in connection.execute(f"SELECT key FROM {table}")]
+
+
+@pytest.mark.parametrize("strategy", [FixedWindowRateLimiter, MovingWindowRateLimiter])
+def test_limit_and_clear(storage, clock, strategy):
+    limiter = strategy(storage)
+
+    assert limiter.hit(LIMIT, "alice")
+    assert limiter.hit(LIMIT, "alice")
+    assert not limiter.hit(LIMIT, "alice")
+    assert limiter.hit(LIMIT, "bob")
+
+    limiter.clear(LIMIT, "alice")
+    assert limiter.hit(LIMIT, "alice")
+
+    clock.now += 61
+    assert limiter.hit(LIMIT, "bob")
+    assert limiter.hit(LIMIT, "bob")
+
+
+def test_moving_window_slides(storage, clock):
+    limiter = MovingWindowRateLimiter(storage)
+
+    assert limiter.hit(LIMIT, "alice")
+    clock.now += 30
+    assert limiter.hit(LIMIT, "alice")
+    clock.now += 31
+    # The first hit left the window, the second has not.
+    assert limiter.hit(LIMIT, "alice")
+    assert not limiter.hit(LIMIT, "alice")
+
+
+def test_reset(storage):
+    FixedWindowRateLimiter(storage).hit(LIMIT, "alice")
+    MovingWindowRateLimiter(storage).hit(LIMIT, "bob")
+
+    assert storage.reset() == 2
+    assert rows(storage, "counter") == rows(storage, "entry") == []
+
+
+def test_idle_keys_are_pruned(storage, clock):
+    FixedWindowRateLimiter(storage).hit(LIMIT, "alice")
+    MovingWindowRateLimiter(storage).hit(LIMIT, "alice")
+
+    clock.now += 61
+    FixedWindowRateLimiter(storage).hit(LIMIT, "bob")
+    MovingWindowRateLimiter(storage).hit(LIMIT, "bob")
+
+    assert rows(storage, "counter") == [LIMIT.key_for("bob")]
+    assert rows(storage, "entry") == [LIMIT.key_for("bob")]
+
+
+def test_rate_limit_key(app, make_user, auth_headers):
+    user = make_user("alice")
+
+    with app.test_request_context(headers=auth_headers(user)):
+        assert rate_limit_key() == f"user:{user.id}"
+
+    with app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+        assert rate_limit_key() == "ip:10.0.0.1"
+
+    # A bad token falls back to the address instead of failing the request.
+    with app.test_request_context(
+        headers={"Authorization": "Bearer nonsense"},
+        environ_base={"REMOTE_ADDR": "10.0.0.1"},
+    ):
+        assert rate_limit_key() == "ip:10.0.0.1"
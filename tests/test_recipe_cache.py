@@ -0,0 +1,49 @@
+from extensions import db
+from models.recipe import Recipe
+from utils import clear_recipe_cache
+
+
+def test_unpublish_during_a_miss_is_not_cached(
+    client, make_user, make_recipe, monkeypatch
+):
+    user = make_user("alice")
+    recipe = make_recipe(user)
+    recipe_id = recipe.id
+    get_by_id = Recipe.get_by_id
+
+    def get_by_id_then_unpublish(recipe_id):
+        # Another request unpublishes after this one has read the row.
+        loaded = get_by_id(recipe_id=recipe_id)
+        db.session.expunge(loaded.user)
+        db.session.expunge(loaded)
+        db.session.execute(
+            db.update(Recipe).where(Recipe.id == recipe_id).values(is_publish=False)
+        )
+        db.session.commit()
+        clear_recipe_cache("alice", recipe_id)
+
+        return loaded
+
+    monkeypatch.setattr(Recipe, "get_by_id", get_by_id_then_unpublish)
+    assert client.get(f"/recipes/{recipe_id}").status_code == 200
+
+    monkeypatch.setattr(Recipe, "get_by_id", get_by_id)
+    assert client.get(f"/recipes/{recipe_id}").status_code == 403
+
+
+def test_edit_replaces_cached_body(client, make_user, make_recipe, auth_headers):
+    user = make_user("alice")
+    recipe = make_recipe(user, name="Old name")
+
+    first = client.get(f"/recipes/{recipe.id}")
+    assert first.json["name"] == "Old name"
+    assert client.get(f"/recipes/{recipe.id}").get_data() == first.get_data()
+
+    response = client.patch(
+        f"/recipes/{recipe.id}", json={"name": "New name"}, headers=auth_headers(user)
+    )
+    assert response.status_code == 200
+
+    second = client.get(f"/recipes/{recipe.id}")
+    assert second.json["name"] == "New name"
+    assert second.headers["ETag"] != first.headers["ETag"]
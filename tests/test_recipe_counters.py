@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from extensions import cache, db
+from models.user import User
+
+LAST_PROFILE_EDIT = datetime(2020, 1, 1, 12, 0, 0)
+
+
+def backdate(user):
+    db.session.execute(
+        db.update(User).where(User.id == user.id).values(updated_at=LAST_PROFILE_EDIT)
+    )
+    db.session.commit()
+
+
+def test_publishing_keeps_author_updated_at(
+    client, make_user, make_recipe, auth_headers
+):
+    user = make_user("alice")
+    cached = make_recipe(user, name="Cached")
+    draft = make_recipe(user, is_publish=False, name="Draft")
+    backdate(user)
+
+    first = client.get(f"/recipes/{cached.id}")
+    assert first.json["author"]["updated_at"] == LAST_PROFILE_EDIT.isoformat()
+
+    response = client.put(f"/recipes/{draft.id}/publish", headers=auth_headers(user))
+    assert response.status_code == 204
+
+    db.session.expire_all()
+    user = User.get_by_id(id=user.id)
+    assert user.updated_at == LAST_PROFILE_EDIT
+    assert user.published_recipe_count == 2
+    assert user.draft_recipe_count == 0
+
+    second = client.get(f"/recipes/{cached.id}")
+    assert second.get_data() == first.get_data()
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    # The cached body still matches what the database says now.
+    cache.clear()
+    assert client.get(f"/recipes/{cached.id}").get_data() == first.get_data()
+
+
+def test_creating_and_deleting_keep_author_updated_at(
+    client, make_user, make_recipe, auth_headers
+):
+    user = make_user("bob")
+    backdate(user)
+
+    response = client.post(
+        "/recipes",
+        json={"name": "Pancakes", "cook_time": 15, "num_of_servings": 2},
+        headers=auth_headers(user),
+    )
+    assert response.status_code == 201
+
+    response = client.delete(
+        f"/recipes/{response.json['id']}", json={}, headers=auth_headers(user)
+    )
+    assert response.status_code == 204
+
+    db.session.expire_all()
+    user = User.get_by_id(id=user.id)
+    assert user.updated_at == LAST_PROFILE_EDIT
+    assert user.recipe_count == 0
@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.mark.parametrize("method", ["put", "patch"])
+def test_invalid_edits_check_the_recipe_first(
+    client, make_user, auth_headers, make_recipe, method
+):
+    alice = make_user("alice")
+    bob = make_user("bob")
+    recipe = make_recipe(alice)
+    invalid = {"name": "Soup", "num_of_servings": 0}
+
+    def edit(recipe_id, user):
+        return getattr(client, method)(
+            f"/recipes/{recipe_id}", json=invalid, headers=auth_headers(user)
+        )
+
+    assert edit(recipe.id + 1, alice).status_code == 404
+    assert edit(recipe.id, bob).status_code == 403
+
+    response = edit(recipe.id, alice)
+    assert response.status_code == 400
+    assert "num_of_servings" in response.get_json()["errors"]
+
+
+@pytest.mark.parametrize("method", ["put", "patch"])
+def test_valid_edits_check_the_recipe_in_the_update(
+    client, make_user, auth_headers, make_recipe, method
+):
+    alice = make_user("alice")
+    bob = make_user("bob")
+    recipe = make_recipe(alice)
+    valid = {"name": "Pea soup", "num_of_servings": 2}
+
+    def edit(recipe_id, user):
+        return getattr(client, method)(
+            f"/recipes/{recipe_id}", json=valid, headers=auth_headers(user)
+        )
+
+    assert edit(recipe.id + 1, alice).status_code == 404
+    assert edit(recipe.id, bob).status_code == 403
+    assert edit(recipe.id, alice).get_json()["name"] == "Pea soup"
+
+
+def test_put_keeps_fields_left_out(count_queries, make_user, auth_headers, make_recipe):
+    alice = make_user("alice")
+    recipe = make_recipe(alice, description="Warm and simple", cook_time=30)
+
+    count, response = count_queries(
+        f"/recipes/{recipe.id}",
+        method="put",
+        json={"name": "Pea soup", "num_of_servings": 4},
+        headers=auth_headers(alice),
+    )
+    data = response.get_json()
+    assert (data["name"], data["num_of_servings"]) == ("Pea soup", 4)
+    assert (data["description"], data["cook_time"]) == ("Warm and simple", 30)
+    # The UPDATE ... RETURNING and the change log row.
+    assert count == 2
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import create_engine, select, update
+
+from extensions import db
+from mail_queue import mail_queue
+from models.mail import MailJob
+from models.user import User
+from routing import PRIMARY_COOKIE, REPLICA_BIND
+
+
+@pytest.fixture
+def replica(app, monkeypatch, tmp_path):
+    """A second database standing in for a replica that has not caught up
+    with anything yet."""
+    engine = create_engine(f"sqlite:///{tmp_path}/replica.sqlite")
+    db.metadata.create_all(engine)
+    monkeypatch.setitem(db.engines, REPLICA_BIND, engine)
+    db.session.remove()
+
+    yield engine
+
+    db.session.remove()
+    engine.dispose()
+
+
+def sign_up(client, username):
+    db.session.remove()
+
+    return client.post(
+        "/users",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "password",
+        },
+    )
+
+
+def get(client, url):
+    db.session.remove()
+
+    return client.get(url)
+
+
+def test_reads_go_to_the_replica(app, replica, make_user):
+    make_user("alice")
+
+    assert get(app.test_client(), "/users/alice").status_code == 404
+
+
+def test_signup_reads_its_own_writes(app, replica):
+    client = app.test_client()
+
+    response = sign_up(client, "alice")
+    assert response.status_code == 201
+    assert PRIMARY_COOKIE in response.headers["Set-Cookie"]
+
+    assert get(client, "/users/alice").status_code == 200
+    assert get(client, "/users/alice/stats").status_code == 200
+    # Without the cookie the replica is read, which has no alice yet.
+    assert get(app.test_client(), "/users/alice").status_code == 404
+
+
+def test_signup_checks_duplicates_on_the_primary(app, replica):
+    assert sign_up(app.test_client(), "alice").status_code == 201
+
+    response = sign_up(app.test_client(), "alice")
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "username already used"
+
+
+def test_core_writes_stick_to_the_primary(app, replica, make_user):
+    user_id = make_user("alice").id
+    db.session.remove()
+    assert db.session.get_bind(clause=select(User)) is replica
+
+    db.session.execute(update(User).where(User.id == user_id).values(is_active=False))
+
+    assert db.session.get_bind(clause=select(User)) is not replica
+    assert db.session.scalar(select(User.is_active).where(User.id == user_id)) is False
+
+
+def test_claim_due_reads_the_primary(app, replica):
+    job_id = mail_queue.enqueue("alice@example.com", "Hello", "Hi there").id
+    db.session.remove()
+
+    claimed = MailJob.claim_due(limit=10, lease=60, max_attempts=3)
+    assert [job.id for job in claimed] == [job_id]
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.user import User
+
+
+def search(client, **query):
+    response = client.get("/recipes", query_string=query)
+    assert response.status_code == 200, response.json
+
+    return response.get_json()
+
+
+def names(page):
+    return [recipe["name"] for recipe in page["data"]]
+
+
+@pytest.fixture
+def soups(make_user, make_recipe):
+    alice = make_user("alice")
+    start = datetime(2026, 1, 1)
+
+    # Name matches weigh 1.0, description 0.4, ingredients 0.2.
+    fields = [
+        ("Tomato soup", "Tomato and basil", 30, 2),
+        ("Tomato salad", "Fresh", 10, None),
+        ("Green salad", "With a tomato", None, 4),
+        ("Bread", "Served with soup", 45, 1),
+        ("Pasta", "Quick", 15, 3),
+    ]
+    for number, (name, description, cook_time, servings) in enumerate(fields):
+        make_recipe(
+            alice,
+            name=name,
+            description=description,
+            cook_time=cook_time,
+            num_of_servings=servings,
+            ingredients="tomato" if name == "Pasta" else "salt",
+            created_at=start + timedelta(days=number),
+        )
+    make_recipe(alice, name="Tomato draft", is_publish=False)
+
+
+def test_relevance_ranks_name_matches_first(client, soups):
+    page = search(client, q="tomato", sort="relevance")
+
+    assert names(page) == ["Tomato soup", "Tomato salad", "Green salad", "Pasta"]
+    assert page["total"] == 4
+
+
+@pytest.mark.parametrize(
+    "sort, order, expected",
+    [
+        ("created_at", "desc", ["Pasta", "Green salad", "Tomato salad", "Tomato soup"]),
+        ("created_at", "asc", ["Tomato soup", "Tomato salad", "Green salad", "Pasta"]),
+        # SQLite sorts NULL first.
+        ("cook_time", "asc", ["Green salad", "Tomato salad", "Pasta", "Tomato soup"]),
+        ("cook_time", "desc", ["Tomato soup", "Pasta", "Tomato salad", "Green salad"]),
+    ],
+)
+def test_sorted_like_the_database(client, soups, sort, order, expected):
+    assert names(search(client, q="tomato", sort=sort, order=order)) == expected
+
+
+def test_pages_and_ranges(client, soups):
+    first = search(client, q="tomato", sort="relevance", per_page=3)
+    second = search(client, q="tomato", sort="relevance", per_page=3, page=2)
+
+    assert names(first) == ["Tomato soup", "Tomato salad", "Green salad"]
+    assert names(second) == ["Pasta"]
+    assert (first["pages"], second["total"]) == (2, 4)
+    assert "next" in first["links"] and "next" not in second["links"]
+
+    response = client.get(
+        "/recipes", query_string={"q": "tomato", "page": 3, "per_page": 3}
+    )
+    assert response.status_code == 404
+
+    # A NULL never satisfies a bound.
+    ranged = search(client, q="tomato", min_cook_time=12, max_servings=3)
+    assert names(ranged) == ["Pasta", "Tomato soup"]
+
+
+def test_cursor_pages_over_matches(client, soups):
+    seen = []
+    page = search(client, q="tomato", paginate="cursor", per_page=3, order="asc")
+    seen.extend(names(page))
+    assert page["links"].get("prev") is None
+
+    response = client.get(page["links"]["next"])
+    seen.extend(names(response.get_json()))
+
+    assert seen == ["Tomato soup", "Tomato salad", "Green salad", "Pasta"]
+
+    back = client.get(response.get_json()["links"]["prev"]).get_json()
+    assert names(back) == ["Tomato soup", "Tomato salad", "Green salad"]
+
+
+def test_edits_reach_the_results(client, soups, auth_headers):
+    page = search(client, q="basil")
+    assert names(page) == ["Tomato soup"]
+
+    alice = User.get_by_username("alice")
+    response = client.patch(
+        f"/recipes/{page['data'][0]['id']}",
+        json={"description": "Plain"},
+        headers=auth_headers(alice),
+    )
+    assert response.status_code == 200
+
+    assert names(search(client, q="basil")) == []
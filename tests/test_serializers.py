@@ -0,0 +1,65 @@
+from flask_restful.representations.json import output_json
+
+from images import image_pipeline
+from models.recipe import Recipe
+from models.stored_image import StoredImage
+from schemas.recipe import RecipeListSerializer, RecipePaginationSchema, RecipeSchema
+
+COVER = "a" * 64 + ".png"
+PENDING_COVER = "b" * 64 + ".jpg"
+AVATAR = "c" * 64 + ".jpg"
+
+
+def seed(make_user, make_recipe):
+    alice = make_user("alice")
+    alice.avatar_image = AVATAR
+    alice.save()
+    bob = make_user("bøb")
+
+    StoredImage.acquire("recipes", COVER)
+    StoredImage.mark_rendered("recipes", COVER)
+    StoredImage.acquire("recipes", PENDING_COVER)
+    StoredImage.acquire("avatars", AVATAR)
+    StoredImage.mark_rendered("avatars", AVATAR)
+
+    make_recipe(alice, name='Grandma\'s "best" pie', cover_image=COVER)
+    make_recipe(alice, name="Crème brûlée 🍮", description=None)
+    make_recipe(bob, name="Ramen ラーメン", cover_image=PENDING_COVER)
+    make_recipe(bob, name="Back\\slash </script>", description="", cook_time=None)
+    make_recipe(bob, name="Toast", ingredients=None, num_of_servings=None)
+    make_recipe(bob, name="Draft", is_publish=False, directions=None)
+
+
+def test_list_serializer_matches_marshmallow(app, make_user, make_recipe):
+    seed(make_user, make_recipe)
+    # Readiness comes from the database, not from this process.
+    image_pipeline._ready.clear()
+
+    with app.test_request_context("/recipes"):
+        recipes = Recipe.query.order_by(Recipe.id).all()
+
+        expected = RecipeSchema(many=True).dump(recipes)
+        actual = RecipeListSerializer().dump_items(recipes)
+
+    assert actual == expected
+    assert output_json(actual, 200).get_data() == output_json(expected, 200).get_data()
+
+    # The edge cases are really there.
+    by_name = {recipe["name"]: recipe for recipe in actual}
+    assert by_name["Crème brûlée 🍮"]["description"] is None
+    assert by_name["Crème brûlée 🍮"]["cover_image_url"].endswith("default-recipe.jpg")
+    assert by_name['Grandma\'s "best" pie']["cover_image_renditions"] is not None
+    assert by_name["Ramen ラーメン"]["cover_image_renditions"] is None
+    assert by_name['Grandma\'s "best" pie']["author"]["avatar_renditions"] is not None
+
+
+def test_page_envelope_matches_marshmallow(app, make_user, make_recipe):
+    seed(make_user, make_recipe)
+
+    with app.test_request_context("/recipes?per_page=2&page=2"):
+        paginated = Recipe.published_query().paginate(page=2, per_page=2)
+
+        expected = RecipePaginationSchema().dump(paginated)
+        actual = RecipeListSerializer().dump(paginated)
+
+    assert actual == expected